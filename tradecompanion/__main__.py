@@ -0,0 +1,66 @@
+# -------------------------------------------------------------------------- #
+# Command line entry point
+# -------------------------------------------------------------------------- #
+# Run from the repository root with:
+#   python -m tradecompanion backtest [--headless] [--profile] [--fresh]
+#   python -m tradecompanion paper
+#   python -m tradecompanion sweep --param signal_window=10,15,20 --param risk_ratio=2,3
+#   python -m tradecompanion universe [--refresh]
+#   python -m tradecompanion benchmark [benchmark options]
+# Import Modules & Packages
+import argparse
+import sys
+
+
+# -------------------------------------------------------------------------- #
+# Function to read a parameter value given on the command line
+# -------------------------------------------------------------------------- #
+def parse_value(text: str):
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog='tradecompanion', description='Momentum trading engine.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    backtest = commands.add_parser('backtest', help='back-test the strategy over the trading window')
+    backtest.add_argument('--headless', action='store_true', help='do not draw the portfolio value')
+    backtest.add_argument('--profile', action='store_true', help='print the time spent in each phase')
+    backtest.add_argument('--fresh', action='store_true', help='do not use the results store')
+    commands.add_parser('paper', help='paper trade the bars that came out since the last session')
+    parameter_sweep = commands.add_parser('sweep', help='back-test a grid of parameters headless')
+    parameter_sweep.add_argument('--param', action='append', default=[], metavar='NAME=V1,V2',
+                                 help='values of one parameter, repeat for every parameter of the grid')
+    parameter_sweep.add_argument('--workers', type=int, help='number of worker processes')
+    universe = commands.add_parser('universe', help='show the universe versions and ticker metadata')
+    universe.add_argument('--refresh', action='store_true', help='scrape a new version of the universe list')
+    commands.add_parser('benchmark', help='run the benchmark suite on synthetic data', add_help=False)
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != 'benchmark':
+        parser.error('unrecognized arguments: {}'.format(' '.join(extra)))
+    # The modules of a command, and the packages they need, are only imported once it is known
+    if args.command == 'benchmark':
+        from .trading_packages import benchmarks
+        return benchmarks.main(extra)
+    from . import tradecompanion as app
+    if args.command == 'backtest':
+        app.main(headless=args.headless, profile=args.profile, fresh=args.fresh)
+    elif args.command == 'paper':
+        app.paper_trade()
+    elif args.command == 'sweep':
+        space = {}
+        for param in args.param:
+            name, _, values = param.partition('=')
+            space[name] = [parse_value(value) for value in values.split(',')]
+        app.parameter_sweep(space, workers=args.workers)
+    elif args.command == 'universe':
+        app.manage_universe(refresh=args.refresh)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
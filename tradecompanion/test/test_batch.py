@@ -0,0 +1,33 @@
+# -------------------------------------------------------------------------- #
+# Tests of the multi-portfolio batch runs
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import pandas as pd
+import pytest
+from ..trading_packages.engine import BacktestEngine, Parameters, run_batch
+from ..trading_packages.synthetic import synthetic_universe
+
+
+def make_engines(equities: dict) -> list:
+    dates = next(iter(equities.values())).panel.dates
+    return [BacktestEngine(equities, dates[260], parameters=Parameters(initial_cash=100000)),
+            BacktestEngine(equities, dates[300], dates[500], name='Small',
+                           parameters=Parameters(initial_cash=4000, risk_per_trade=0.02, signal_window=15)),
+            BacktestEngine(equities, dates[260], parameters=Parameters(initial_cash=50000, risk_ratio=3))]
+
+
+def test_batch_matches_separate_runs():
+    equities = synthetic_universe(20, 700)
+    batch = run_batch(make_engines(equities))
+    for engine, result in zip(make_engines(equities), batch):
+        alone = engine.run()
+        pd.testing.assert_frame_equal(result.trading_engine, alone.trading_engine)
+        pd.testing.assert_frame_equal(result.log_df(), alone.log_df())
+        assert (result.nb_of_wins, result.nb_of_losses) == (alone.nb_of_wins, alone.nb_of_losses)
+        assert result.portfolio.name == engine.name
+
+
+def test_batch_needs_one_panel():
+    engines = make_engines(synthetic_universe(3, 700))[:1] + make_engines(synthetic_universe(3, 700))[:1]
+    with pytest.raises(ValueError):
+        run_batch(engines)
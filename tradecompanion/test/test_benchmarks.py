@@ -0,0 +1,23 @@
+# -------------------------------------------------------------------------- #
+# Smoke tests of the benchmark suite, on a tiny synthetic universe
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+from ..trading_packages.engine import BacktestEngine
+from ..trading_packages.profiling import PhaseTimer
+from ..trading_packages import benchmarks
+from ..trading_packages.synthetic import synthetic_universe
+
+
+def test_engine_profiler_reports_phases():
+    equities = synthetic_universe(5, 400)
+    profiler = PhaseTimer()
+    panel = next(iter(equities.values())).panel
+    BacktestEngine(equities, panel.dates[260], profiler=profiler).run()
+    assert {'signal scan', 'position closing', 'recording'} <= set(profiler.report().index)
+
+
+def test_benchmarks_run(tmp_path):
+    saved = tmp_path / 'timings.json'
+    assert benchmarks.main(['--tickers', '3', '--days', '300', '--save', str(saved)]) == 0
+    assert benchmarks.main(['--tickers', '3', '--days', '300', '--baseline', str(saved),
+                            '--tolerance', '1000']) == 0
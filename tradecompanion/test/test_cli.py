@@ -0,0 +1,24 @@
+# -------------------------------------------------------------------------- #
+# Tests of the command line entry point and of the lazy imports
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import subprocess
+import sys
+from pathlib import Path
+from .. import __main__ as cli
+
+
+def test_parse_value():
+    assert [cli.parse_value(text) for text in ('10', '2.5', 'ema')] == [10, 2.5, 'ema']
+
+
+def test_benchmark_command():
+    assert cli.main(['benchmark', '--tickers', '2', '--days', '300']) == 0
+
+
+def test_engine_imports_no_optional_packages():
+    code = ('import sys; import tradecompanion.trading_packages.sweep, tradecompanion.trading_packages.session; '
+            'print(sorted({"yfinance", "requests", "bs4", "matplotlib"} & set(sys.modules)))')
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=Path(__file__).parents[2]).stdout
+    assert output.strip() == '[]'
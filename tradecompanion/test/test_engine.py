@@ -0,0 +1,43 @@
+# -------------------------------------------------------------------------- #
+# Tests of the back-test engine on gapped market data
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import numpy as np
+import pandas as pd
+from ..trading_packages import equities_universe as eu
+from ..trading_packages.engine import BacktestEngine
+from ..trading_packages.synthetic import SyntheticSource, synthetic_universe
+
+
+class GappedSource(SyntheticSource):
+    # Synthetic bars with the bars of some (ticker, date) pairs missing, like a halt or a data gap
+    def __init__(self, n_days: int, gaps: dict):
+        super().__init__(n_days)
+        self.gaps = gaps
+
+    def fetch(self, tick, start_date, end_date=None, r='1d'):
+        ohcl = super().fetch(tick, start_date, end_date, r=r)
+        return ohcl.drop(index=pd.DatetimeIndex(self.gaps.get(tick, [])))
+
+
+def test_held_ticker_without_bar_keeps_its_value():
+    equities = synthetic_universe(80, 600)
+    panel = next(iter(equities.values())).panel
+    alone = BacktestEngine(equities, panel.dates[260]).run()
+    log = alone.log_df()
+    # A position held for a while, whose ticker then misses a few bars in the middle of the position
+    held = log[log['Close_date'] - log['Open Date'] > pd.Timedelta(days=10)].iloc[0]
+    gap = [d for d in panel.dates if held['Open Date'] < d < held['Close_date']][2:5]
+    gapped = eu.load_universe(list(panel.tickers), None, None, workers=1, precompute=True,
+                              source=GappedSource(600, {held['ticker']: gap}))
+    result = BacktestEngine(gapped, panel.dates[260]).run()
+    values, expected = result.trading_engine, alone.trading_engine
+    assert np.isfinite(values.values).all()
+    assert np.isfinite([result.portfolio.cagr_KPI, result.portfolio.sharpe_KPI, result.portfolio.sortino_KPI]).all()
+    # Same run up to the gap, then the position is valued at its last close before the gap
+    first = values.index.get_loc(gap[0])
+    pd.testing.assert_frame_equal(values.iloc[:first], expected.iloc[:first])
+    ticker_id = panel.ticker_id[held['ticker']]
+    day = panel.position(gap[0])
+    shift = held['Nb of Shares'] * (panel.close[day - 1, ticker_id] - panel.close[day, ticker_id])
+    assert np.isclose(values.iloc[first, 1] - expected.iloc[first, 1], shift)
@@ -0,0 +1,51 @@
+# -------------------------------------------------------------------------- #
+# Tests of the full-history indicators against the windowed Stock methods
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import numpy as np
+import pandas as pd
+from ..trading_packages.synthetic import synthetic_universe
+
+
+def windowed_and_precomputed(stock, call) -> tuple:
+    stock.precompute = False
+    windowed = call(stock)
+    stock.precompute = True
+    precomputed = call(stock)
+    stock.precompute = False
+    return windowed, precomputed
+
+
+def test_precomputed_indicators_match_windowed():
+    equities = synthetic_universe(3, 400, precompute=False)
+    calls = [lambda stock, d: stock.atr(d),
+             lambda stock, d: stock.atr(d, window=5),
+             lambda stock, d: stock.moving_avg(d),
+             lambda stock, d: stock.moving_avg(d, window=20, avg_type='ema'),
+             lambda stock, d: stock.stochastics(d),
+             lambda stock, d: stock.signal(d, window=10, volume_margin=1)]
+    for stock in equities.values():
+        for d in stock.panel.dates[60::7]:
+            for call in calls:
+                windowed, precomputed = windowed_and_precomputed(stock, lambda s: call(s, d))
+                assert np.isclose(windowed, precomputed, equal_nan=True)
+
+
+def test_precomputed_macd_matches_windowed():
+    equities = synthetic_universe(3, 400, precompute=False)
+    for stock in equities.values():
+        for d in stock.panel.dates[60::7]:
+            (windowed, bullish), (precomputed, precomputed_bullish) = \
+                windowed_and_precomputed(stock, lambda s: s.macd(d))
+            assert bullish == precomputed_bullish
+            pd.testing.assert_index_equal(windowed.index, precomputed.index)
+            assert np.allclose(windowed.values, precomputed.values, equal_nan=True)
+
+
+def test_panel_signals_match_stock_signals():
+    equities = synthetic_universe(5, 400, precompute=True)
+    panel = next(iter(equities.values())).panel
+    signals = panel.signals(window=10, volume_margin=1)
+    for tick, stock in equities.items():
+        column = [stock.signal(d, window=10, volume_margin=1) for d in panel.dates]
+        assert np.array_equal(signals[:, panel.ticker_id[tick]], column)
@@ -0,0 +1,53 @@
+# -------------------------------------------------------------------------- #
+# Tests of the memory-mapped intraday bar store
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import numpy as np
+import pandas as pd
+from ..trading_packages.engine import BacktestEngine
+from ..trading_packages.equities_universe import Stock
+from ..trading_packages import intraday
+from ..trading_packages.synthetic import synthetic_ohcl
+
+
+def make_store(tmp_path, tickers=('AAA', 'BBB'), n_bars=3000) -> intraday.BarStore:
+    store = intraday.BarStore(tmp_path, interval='5m')
+    for tick in tickers:
+        bars = synthetic_ohcl(tick, n_bars, freq='5min')
+        # Overlapping appends only write the new bars
+        assert store.append(tick, bars.iloc[:2000]) == 2000
+        assert store.append(tick, bars.iloc[1500:]) == n_bars - 2000
+    return store
+
+
+def test_append_and_read_windows(tmp_path):
+    store = make_store(tmp_path)
+    bars = synthetic_ohcl('AAA', 3000, freq='5min')
+    assert store.tickers() == ['AAA', 'BBB']
+    assert store.span('AAA') == (bars.index[0], bars.index[-1])
+    window = store.read('AAA', bars.index[1000], bars.index[1100], lookback=10)
+    pd.testing.assert_frame_equal(window, bars.iloc[990:1100][window.columns], check_freq=False)
+
+
+def test_intraday_stock_matches_full_history_stock(tmp_path):
+    store = make_store(tmp_path, tickers=('AAA',))
+    full = Stock('AAA', None, None, panel=store.load_panel(['AAA'], store.span('AAA')[0]))
+    times = full.panel.dates[300::250]
+    for precompute in (False, True):
+        stock = intraday.IntradayStock('AAA', times[0], None, precompute=precompute, store=store, chunk=500)
+        full.precompute = precompute
+        for t in times:
+            assert np.isclose(stock.atr(t), full.atr(t))
+            assert np.isclose(stock.moving_avg(t, avg_type='ema'), full.moving_avg(t, avg_type='ema'))
+            assert stock.signal(t, window=10, volume_margin=1) == full.signal(t, window=10, volume_margin=1)
+            # Only a chunk of the history is held in memory
+            assert len(stock.panel.dates) <= stock.lookback + stock.chunk
+
+
+def test_engine_runs_on_intraday_window(tmp_path):
+    store = make_store(tmp_path)
+    start = store.span('AAA')[0] + pd.Timedelta(days=2)
+    equities = intraday.load_intraday_universe(store, ['AAA', 'BBB'], start, precompute=True)
+    panel = equities['AAA'].panel
+    result = BacktestEngine(equities, start.to_pydatetime()).run()
+    assert len(result.trading_engine) == len(panel.dates) - panel.position(start.to_pydatetime())
@@ -0,0 +1,112 @@
+# -------------------------------------------------------------------------- #
+# Tests of the data providers: CSV files, rate limiting and retries, SQLite cache
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from ..trading_packages import equities_universe as eu
+from ..trading_packages import market_data as md
+from ..trading_packages.synthetic import SyntheticSource, synthetic_ohcl
+
+
+class CountingSource(md.DataSource):
+    # Records every request, and can fail or return truncated data
+    def __init__(self, source: md.DataSource, failures: int = 0, last_date: datetime.date = None):
+        self.source = source
+        self.failures = failures
+        self.last_date = last_date
+        self.calls = []
+
+    def fetch(self, tick, start_date, end_date=None, r='1d'):
+        self.calls.append((start_date, end_date))
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('download failed')
+        if self.last_date is not None:
+            end_date = self.last_date if end_date is None else min(end_date, self.last_date)
+        return self.source.fetch(tick, start_date, end_date, r=r)
+
+
+def test_csv_source_slices_dates(tmp_path):
+    synthetic_ohcl('T0000', 100).to_csv(tmp_path / 'T0000.csv')
+    ohcl = md.CsvSource(tmp_path).fetch('T0000', datetime.date(2010, 2, 1), datetime.date(2010, 3, 1))
+    assert ohcl.index.name == 'Date'
+    assert ohcl.index[0] == pd.Timestamp('2010-02-01') and ohcl.index[-1] == pd.Timestamp('2010-02-26')
+    expected = md.date_slice(synthetic_ohcl('T0000', 100), datetime.date(2010, 2, 1), datetime.date(2010, 3, 1))
+    pd.testing.assert_frame_equal(ohcl, expected, check_freq=False)
+
+
+def test_rate_limited_source_retries_with_backoff(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(md.time, 'sleep', sleeps.append)
+    source = CountingSource(SyntheticSource(100), failures=2)
+    ohcl = md.RateLimitedSource(source, calls_per_second=1e9, retries=3, backoff=0.5).fetch('T0000', None)
+    assert len(ohcl) == 100 and len(source.calls) == 3
+    assert [wait for wait in sleeps if wait >= 0.5] == [0.5, 1.0]
+    # The last error is raised once every retry failed
+    source = CountingSource(SyntheticSource(100), failures=5)
+    with pytest.raises(ConnectionError):
+        md.RateLimitedSource(source, calls_per_second=1e9, retries=2, backoff=0.5).fetch('T0000', None)
+    assert len(source.calls) == 3
+
+
+def test_cached_source_fills_gaps_and_serves_from_store(tmp_path):
+    source = CountingSource(SyntheticSource(500))
+    cache = md.CachedSource(source, tmp_path / 'ohcl.db')
+    first = cache.fetch('T0000', datetime.date(2010, 6, 1), datetime.date(2010, 9, 1))
+    assert len(source.calls) == 1
+    # A second call inside the stored range is served from the store
+    pd.testing.assert_frame_equal(cache.fetch('T0000', datetime.date(2010, 7, 1), datetime.date(2010, 8, 1)),
+                                  md.date_slice(first, datetime.date(2010, 7, 1), datetime.date(2010, 8, 1)))
+    assert len(source.calls) == 1
+    # A wider request only downloads the ranges before and after the stored one
+    wide = cache.fetch('T0000', datetime.date(2010, 3, 1), datetime.date(2010, 12, 1))
+    assert source.calls[1:] == [(datetime.date(2010, 3, 1), datetime.date(2010, 6, 1)),
+                                (datetime.date(2010, 8, 31), datetime.date(2010, 12, 1))]
+    expected = md.date_slice(synthetic_ohcl('T0000', 500), datetime.date(2010, 3, 1), datetime.date(2010, 12, 1))
+    pd.testing.assert_frame_equal(wide, expected, check_freq=False)
+
+
+def test_cached_source_only_covers_returned_bars(tmp_path):
+    # A provider returning nothing, or stopping early, does not mark the rest of the range as stored
+    source = CountingSource(SyntheticSource(500), last_date=datetime.date(2010, 1, 1))
+    cache = md.CachedSource(source, tmp_path / 'ohcl.db', max_age=datetime.timedelta(0))
+    assert cache.fetch('T0000', datetime.date(2010, 1, 4), datetime.date(2010, 3, 1)).empty
+    assert cache.coverage('T0000') is None
+    source.last_date = datetime.date(2010, 2, 1)
+    cache.fetch('T0000', datetime.date(2010, 1, 4), datetime.date(2010, 3, 1))
+    assert cache.coverage('T0000') == (pd.Timestamp('2010-01-04'), pd.Timestamp('2010-01-29 00:00:01'))
+    source.last_date = None
+    ohcl = cache.fetch('T0000', datetime.date(2010, 1, 4), datetime.date(2010, 3, 1))
+    assert source.calls[-1] == (datetime.date(2010, 1, 29), datetime.date(2010, 3, 1))
+    assert ohcl.index[-1] == pd.Timestamp('2010-02-26')
+    assert cache.coverage('T0000')[1] == pd.Timestamp('2010-02-26 00:00:01')
+
+
+def test_cached_source_warm_and_offline_reruns(tmp_path):
+    tickers = ['T0000', 'T0001', 'T0002']
+    source = CountingSource(SyntheticSource(500))
+    cold = eu.load_panel(tickers, datetime.date(2010, 3, 1), None, workers=1,
+                         source=md.CachedSource(source, tmp_path / 'ohcl.db'))
+    assert len(source.calls) == 3
+    # The bars after the stored ones were asked for today, a rerun is served from the store
+    warm = eu.load_panel(tickers, datetime.date(2010, 3, 1), None, workers=1,
+                         source=md.CachedSource(source, tmp_path / 'ohcl.db'))
+    assert len(source.calls) == 3
+    assert np.array_equal(warm.close, cold.close, equal_nan=True)
+    # Offline, once the stored bars are due for an update, the stored bars are still used
+    source.failures = 3
+    with pytest.warns(UserWarning, match='using the stored bars'):
+        offline = eu.load_panel(tickers, datetime.date(2010, 3, 1), None, workers=1,
+                                source=md.CachedSource(source, tmp_path / 'ohcl.db', max_age=datetime.timedelta(0)))
+    assert len(source.calls) == 6
+    assert offline.tickers == tickers and offline.failed == []
+    assert np.array_equal(offline.close, cold.close, equal_nan=True)
+    # Without stored bars the error is raised, the ticker is reported as failed
+    source.failures = 1
+    with pytest.warns(UserWarning, match='T0003'):
+        missing = eu.load_panel(['T0003'], datetime.date(2010, 3, 1), None, workers=1,
+                                source=md.CachedSource(source, tmp_path / 'ohcl.db'))
+    assert missing.failed == ['T0003']
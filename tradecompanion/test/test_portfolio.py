@@ -0,0 +1,47 @@
+# -------------------------------------------------------------------------- #
+# Tests of the portfolio KPIs: batch and running calculations against the KPI functions
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import numpy as np
+import pandas as pd
+from ..trading_packages import portfolio as pf
+
+
+def test_batch_kpis_match_kpi_functions():
+    daily_value = pd.Series(4000 * np.cumprod(1 + np.random.default_rng(1).normal(0, 0.01, 500)),
+                            index=pd.bdate_range('2015-01-05', periods=500))
+    kpis = pf.batch_kpis(daily_value.values, rf=0.025).iloc[0]
+    assert np.isclose(kpis['cagr'], pf.cagr(daily_value))
+    assert np.isclose(kpis['volatility'], pf.volatility(daily_value))
+    assert np.isclose(kpis['sharpe'], pf.sharpe(daily_value, rf=0.025))
+    assert np.isclose(kpis['sortino'], pf.sortino(daily_value, rf=0.025))
+
+
+def test_batch_kpis_carry_missing_values_forward():
+    values = 4000 * np.cumprod(1 + np.random.default_rng(3).normal(0.0005, 0.01, 500))
+    values[[50, 51, 300]] = np.nan
+    daily_value = pd.Series(values, index=pd.bdate_range('2015-01-05', periods=500))
+    kpis = pf.batch_kpis(np.vstack([values, values[::-1]]), rf=0.025).iloc[0]
+    assert np.isclose(kpis['cagr'], pf.cagr(daily_value))
+    assert np.isclose(kpis['volatility'], pf.volatility(daily_value))
+    assert np.isclose(kpis['sharpe'], pf.sharpe(daily_value, rf=0.025))
+    assert np.isclose(kpis['sortino'], pf.sortino(daily_value, rf=0.025))
+    padded = daily_value.ffill()
+    assert np.isclose(kpis['max_drawdown'], (1 - padded / padded.cummax()).max())
+
+
+def test_running_kpi_matches_kpi_functions():
+    values = 4000 * np.cumprod(1 + np.random.default_rng(2).normal(0.0005, 0.01, 500))
+    values[[100, 101, 250, 499]] = np.nan  # Days without a portfolio value
+    daily_value = pd.Series(values, index=pd.bdate_range('2015-01-05', periods=500))
+    kpi = pf.RunningKPI(rf=0.025, window=21)
+    for value in values:
+        kpi.update(value)
+    assert np.isclose(kpi.cagr, pf.cagr(daily_value))
+    assert np.isclose(kpi.volatility, pf.volatility(daily_value))
+    assert np.isclose(kpi.sharpe, pf.sharpe(daily_value, rf=0.025))
+    assert np.isclose(kpi.sortino, pf.sortino(daily_value, rf=0.025))
+    padded = daily_value.ffill()
+    assert np.isclose(kpi.rolling_return, padded.iloc[-1] / padded.iloc[-22] - 1)
+    assert np.isclose(kpi.rolling_volatility, padded.pct_change().iloc[-21:].std() * np.sqrt(252))
+    assert np.isclose(kpi.max_drawdown, (1 - padded / padded.cummax()).max())
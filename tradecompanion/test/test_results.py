@@ -0,0 +1,64 @@
+# -------------------------------------------------------------------------- #
+# Tests of the checkpoints and of the results store
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import pandas as pd
+import pytest
+from ..trading_packages.engine import BacktestEngine, Parameters
+from ..trading_packages.results import ResultStore, engine_key
+from ..trading_packages import sweep
+from ..trading_packages.synthetic import synthetic_universe
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_at(date):
+    def on_day(engine, data_date):
+        if data_date == date:
+            raise Interrupted()
+    return on_day
+
+
+def test_completed_runs_are_cached(tmp_path):
+    equities = synthetic_universe(10, 600)
+    dates = next(iter(equities.values())).panel.dates
+    store = ResultStore(tmp_path / 'results.db')
+    first = store.run(BacktestEngine(equities, dates[260]))
+    cached = store.run(BacktestEngine(equities, dates[260]))
+    pd.testing.assert_frame_equal(cached.trading_engine, first.trading_engine)
+    pd.testing.assert_frame_equal(cached.log_df(), first.log_df())
+    # Other parameters or other data make another key
+    other = BacktestEngine(equities, dates[260], parameters=Parameters(risk_ratio=3))
+    assert store.result(engine_key(other)) is None
+    assert engine_key(BacktestEngine(synthetic_universe(10, 601), dates[260])) \
+        != engine_key(BacktestEngine(equities, dates[260]))
+
+
+def test_interrupted_run_resumes_from_checkpoint(tmp_path):
+    equities = synthetic_universe(10, 600)
+    dates = next(iter(equities.values())).panel.dates
+    store = ResultStore(tmp_path / 'results.db')
+    with pytest.raises(Interrupted):
+        store.run(BacktestEngine(equities, dates[260], on_day=interrupt_at(dates[500])), every=100)
+    engine = BacktestEngine(equities, dates[260])
+    assert store.checkpoint(engine_key(engine))['next_day'] == 460
+    resumed = store.run(engine, every=100)
+    assert store.checkpoint(engine_key(engine)) is None
+    uninterrupted = BacktestEngine(equities, dates[260]).run()
+    pd.testing.assert_frame_equal(resumed.trading_engine, uninterrupted.trading_engine)
+    pd.testing.assert_frame_equal(resumed.log_df(), uninterrupted.log_df())
+
+
+def test_sweep_is_served_from_store(tmp_path, monkeypatch):
+    equities = synthetic_universe(10, 600)
+    panel = next(iter(equities.values())).panel
+    store = ResultStore(tmp_path / 'results.db')
+    combinations = sweep.parameter_grid({'signal_window': [10, 15], 'risk_ratio': [2, 3]})
+    first = sweep.run_sweep(panel, panel.dates[260], combinations[:3], workers=2, store=store)
+    second = sweep.run_sweep(panel, panel.dates[260], combinations, workers=2, store=store)
+    pd.testing.assert_frame_equal(second.iloc[:3], first)
+    # Every combination is in the store now, no worker process is started
+    monkeypatch.setattr(sweep, 'ProcessPoolExecutor', None)
+    pd.testing.assert_frame_equal(sweep.run_sweep(panel, panel.dates[260], combinations, store=store), second)
@@ -0,0 +1,82 @@
+# -------------------------------------------------------------------------- #
+# Tests of the persistent trading session
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from ..trading_packages.engine import BacktestEngine, Parameters
+from ..trading_packages.panel import MarketPanel, PANEL_FIELDS
+from ..trading_packages.session import TradingSession
+from ..trading_packages.synthetic import SyntheticSource, synthetic_universe
+
+
+class FlakySource(SyntheticSource):
+    # The downloads of a ticker fail a given number of times, the requested end dates are recorded
+    def __init__(self, n_days: int, failures: dict):
+        super().__init__(n_days)
+        self.failures = failures
+        self.end_dates = []
+
+    def fetch(self, tick, start_date, end_date=None, r='1d'):
+        self.end_dates.append(end_date)
+        if self.failures.get(tick, 0) > 0:
+            self.failures[tick] -= 1
+            raise ConnectionError('download failed')
+        return super().fetch(tick, start_date, end_date, r=r)
+
+
+def bar(panel: MarketPanel, day: int) -> MarketPanel:
+    return MarketPanel(panel.index[day:day + 1], panel.tickers,
+                       **{name: getattr(panel, name)[day:day + 1] for name in PANEL_FIELDS.values()})
+
+
+def test_session_bar_by_bar_matches_backtest(tmp_path):
+    equities = synthetic_universe(20, 700)
+    panel = next(iter(equities.values())).panel
+    parameters = Parameters(initial_cash=100000)
+    full = BacktestEngine(equities, panel.dates[260], parameters=parameters).run()
+
+    engine = BacktestEngine(equities, panel.dates[260], panel.dates[499], parameters=parameters)
+    engine.run()
+    session = TradingSession.from_engine(tmp_path, engine, lookback=128)
+    for day in range(500, len(panel.dates)):
+        assert session.ingest(bar(panel, day)) == [panel.dates[day]]
+        # The session is saved after every bar and can be picked up again
+        if day % 50 == 0:
+            session = TradingSession.load(tmp_path)
+        assert len(session.engine.panel.dates) == 128
+    # Bars that were already ingested are skipped
+    assert session.ingest(bar(panel, len(panel.dates) - 1)) == []
+
+    curve = session.equity_curve()
+    assert np.allclose(curve.values, full.trading_engine.values)
+    assert list(curve.index) == list(full.trading_engine.index)
+    pd.testing.assert_frame_equal(session.log_df(), full.log_df())
+    assert session.engine.nb_of_wins == full.nb_of_wins
+    assert np.isclose(session.engine.kpi.sharpe, full.portfolio.sharpe_KPI)
+
+
+def test_session_waits_for_failed_downloads(tmp_path):
+    equities = synthetic_universe(20, 700)
+    panel = next(iter(equities.values())).panel
+    full = BacktestEngine(equities, panel.dates[260]).run()
+    engine = BacktestEngine(equities, panel.dates[260], panel.dates[499])
+    engine.run()
+    source = FlakySource(700, {'T0003': 1, 'T0005': 100})
+    session = TradingSession.from_engine(tmp_path, engine, lookback=128, source=source, workers=1)
+    # Nothing is traded while a download fails, the same bars are requested again on the next update
+    with pytest.warns(UserWarning, match='T0003, T0005'):
+        assert session.update(panel.dates[510]) == []
+    with pytest.warns(UserWarning, match='T0005'):
+        assert session.update(panel.dates[510]) == []
+    assert TradingSession.load(tmp_path).failed_updates == {'T0005': 2}
+    # A ticker that keeps failing no longer holds the session back (T0005 is never traded)
+    assert session.update(panel.dates[510]) == list(panel.dates[500:510])
+    assert np.allclose(session.equity_curve().values, full.trading_engine.values[:250])
+    # By default the bars up to yesterday are downloaded, as today's bar is not final. The update
+    # brings more dates than the lookback.
+    session.update()
+    assert source.end_dates[-1] == datetime.date.today()
+    assert session.calendar[-1] == panel.dates[-1]
@@ -0,0 +1,62 @@
+# -------------------------------------------------------------------------- #
+# Tests of the parameter sweeps and of the walk-forward optimization
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import numpy as np
+from ..trading_packages.engine import BacktestEngine, Parameters
+from ..trading_packages.results import result_kpis
+from ..trading_packages import sweep
+from ..trading_packages.synthetic import synthetic_universe
+
+
+def alone_kpis(equities: dict, start_trading_date, end_trading_date, combination: dict) -> dict:
+    return result_kpis(BacktestEngine(equities, start_trading_date, end_trading_date,
+                                      parameters=Parameters(**combination)).run())
+
+
+def assert_same_kpis(row, kpis: dict):
+    for kpi, value in kpis.items():
+        assert np.isclose(row[kpi], value, equal_nan=True), kpi
+
+
+def test_parameter_grid_and_random_search():
+    grid = sweep.parameter_grid({'signal_window': [10, 15], 'risk_ratio': [2, 3, 4]})
+    assert len(grid) == 6 and {'signal_window': 15, 'risk_ratio': 4} in grid
+    space = {'signal_window': (5, 30), 'risk_per_trade': (0.005, 0.02), 'risk_ratio': [2, 3]}
+    combinations = sweep.random_search(space, 50, seed=7)
+    assert combinations == sweep.random_search(space, 50, seed=7)
+    assert all(isinstance(c['signal_window'], int) and 5 <= c['signal_window'] <= 30 for c in combinations)
+    assert all(isinstance(c['risk_per_trade'], float) and 0.005 <= c['risk_per_trade'] <= 0.02
+               for c in combinations)
+    assert {c['risk_ratio'] for c in combinations} == {2, 3}
+
+
+def test_sweep_over_workers_matches_separate_runs():
+    equities = synthetic_universe(10, 600)
+    panel = next(iter(equities.values())).panel
+    combinations = sweep.parameter_grid({'signal_window': [10, 15], 'risk_ratio': [2, 3]})
+    results = sweep.run_sweep(panel, panel.dates[260], combinations, workers=2)
+    assert list(results.columns) == ['signal_window', 'risk_ratio'] + sweep.KPI_COLUMNS
+    for combination, (_, row) in zip(combinations, results.iterrows()):
+        assert row[list(combination)].to_dict() == combination
+        assert_same_kpis(row, alone_kpis(equities, panel.dates[260], None, combination))
+
+
+def test_walk_forward_splits_and_best_combination():
+    equities = synthetic_universe(10, 700)
+    panel = next(iter(equities.values())).panel
+    dates = panel.dates
+    combinations = sweep.parameter_grid({'signal_window': [10, 15], 'risk_ratio': [2, 3]})
+    report = sweep.walk_forward(panel, dates[260], combinations, train_days=200, test_days=100, workers=2)
+    # Train windows roll forward by one test window, each test window follows its train window
+    assert list(report['train_start']) == [dates[260], dates[360]]
+    assert list(report['train_end']) == [dates[459], dates[559]]
+    assert list(report['test_start']) == [dates[460], dates[560]]
+    assert list(report['test_end']) == [dates[559], dates[659]]
+    for _, row in report.iterrows():
+        train = [alone_kpis(equities, row['train_start'], row['train_end'], c)['sharpe'] for c in combinations]
+        best = combinations[int(np.nanargmax(train))]
+        assert row[list(best)].to_dict() == best
+        assert np.isclose(row['train_sharpe'], np.nanmax(train))
+        assert_same_kpis({kpi: row['test_' + kpi] for kpi in sweep.KPI_COLUMNS},
+                         alone_kpis(equities, row['test_start'], row['test_end'], best))
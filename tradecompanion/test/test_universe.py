@@ -0,0 +1,114 @@
+# -------------------------------------------------------------------------- #
+# Tests of the universe store and of the liquidity prefilter
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from ..trading_packages import equities_universe as eu
+from ..trading_packages.engine import BacktestEngine, Parameters
+from ..trading_packages.panel import MarketPanel, PANEL_FIELDS
+from ..trading_packages.universe import UniverseStore, availability
+from ..trading_packages.synthetic import SyntheticSource, synthetic_universe
+
+
+class PartialSource(SyntheticSource):
+    # No data for the DEAD* tickers, LATE only starts trading halfway and the download of DOWN fails
+    def fetch(self, tick, start_date, end_date=None, r='1d') -> pd.DataFrame:
+        if tick == 'DOWN':
+            raise ConnectionError('download failed')
+        ohcl = super().fetch(tick, start_date, end_date, r=r)
+        if tick.startswith('DEAD'):
+            return ohcl.iloc[:0]
+        return ohcl.iloc[self.n_days // 2:] if tick == 'LATE' else ohcl
+
+
+def test_universe_versions(tmp_path):
+    store = UniverseStore(tmp_path / 'universe.db')
+    assert store.members() is None
+    assert store.save_list(['BBB', 'AAA'], source='csv') == 1
+    # The same list does not make a new version
+    assert store.save_list(['AAA', 'BBB', 'AAA'], source='csv') == 1
+    assert store.refresh(lambda: ['AAA', 'CCC']) == 2
+    assert store.members() == ['AAA', 'CCC']
+    assert store.members(1) == ['AAA', 'BBB']
+    assert store.versions()['source'].tolist() == ['csv', 'wealthsimple']
+
+
+def test_tickers_are_validated_once(tmp_path):
+    store = UniverseStore(tmp_path / 'universe.db')
+    tickers = ['AAA', 'DEAD1', 'LATE', 'DEAD2']
+    panel = eu.load_panel(tickers, None, None, workers=1, source=PartialSource(400))
+    # An empty reply can be a failed download, a ticker is only invalid once it had no data on 3 days
+    day = datetime.datetime(2024, 3, 4, 9)
+    for checked in [day, day + datetime.timedelta(hours=8), day + datetime.timedelta(days=1)]:
+        store.record_panel(panel, tickers, checked=checked)
+        assert store.eligible(tickers) == tickers
+    assert store.metadata().at['DEAD1', 'empty_checks'] == 2
+    store.record_panel(panel, tickers, checked=day + datetime.timedelta(days=2))
+    assert store.eligible(tickers + ['NEW']) == ['AAA', 'LATE', 'NEW']
+    metadata = store.metadata()
+    assert metadata.at['LATE', 'first_date'] == str(panel.dates[200])
+    assert metadata.at['DEAD1', 'status'] == 'invalid'
+    store.revalidate(['DEAD1'])
+    assert 'DEAD1' in store.eligible(tickers)
+    ranges = availability(panel)
+    assert ranges.loc['AAA', 'nb_of_bars'] == 400 and ranges.loc['LATE', 'nb_of_bars'] == 200
+
+
+def test_failed_downloads_are_not_invalidated(tmp_path):
+    store = UniverseStore(tmp_path / 'universe.db')
+    tickers = ['AAA', 'DOWN', 'DEAD1']
+    with pytest.warns(UserWarning, match='DOWN'):
+        panel = eu.load_panel(tickers, None, None, workers=1, source=PartialSource(400))
+    assert panel.tickers == ['AAA', 'DEAD1'] and panel.failed == ['DOWN']
+    store.record_panel(panel, tickers)
+    # DOWN stays unchecked, so it is loaded again next time, while DEAD1 returned no bars
+    metadata = store.metadata()
+    assert 'DOWN' not in metadata.index
+    assert metadata.at['DEAD1', 'status'] == 'empty'
+
+
+def test_liquidity_prefilter():
+    equities = synthetic_universe(20, 600)
+    panel = next(iter(equities.values())).panel
+    dollar_volume = panel.dollar_volume(20)
+    threshold = np.nanmedian(dollar_volume)
+    eligible = panel.eligibility(20, min_dollar_volume=threshold)
+    assert np.array_equal(eligible, dollar_volume >= threshold)
+    assert not eligible[:19].any()
+    day = panel.dates[400]
+    assert panel.eligible_tickers(day, min_dollar_volume=threshold) == \
+        [tick for j, tick in enumerate(panel.tickers) if eligible[400, j]]
+    # Thresholds of 0 leave the scan as it is, a threshold above every ticker stops all trading
+    default = BacktestEngine(equities, panel.dates[260]).run()
+    unfiltered = BacktestEngine(equities, panel.dates[260], parameters=Parameters(liquidity_window=30)).run()
+    pd.testing.assert_frame_equal(default.log_df(), unfiltered.log_df())
+    filtered = BacktestEngine(equities, panel.dates[260],
+                              parameters=Parameters(min_dollar_volume=np.nanmax(dollar_volume) * 2)).run()
+    assert len(filtered.log_df()) == 0 < len(default.log_df())
+
+
+def test_signals_of_eligible_tickers_only():
+    equities = synthetic_universe(20, 600)
+    panel = next(iter(equities.values())).panel
+    # Only the tickers above the threshold on some date are scanned
+    threshold = np.nanquantile(np.nanmax(panel.dollar_volume(20), axis=0), 0.5)
+    liquidity = (20, threshold, 0.0)
+    eligible = panel.eligibility(*liquidity)
+    assert 0 < eligible.any(axis=0).sum() < len(panel.tickers)
+    signals = panel.signals(10, 1, liquidity=liquidity)
+    assert np.array_equal(signals, panel.signals(10, 1) & eligible)
+    day = panel.dates[400]
+    assert panel.scan_signals(day, 10, 1, liquidity=liquidity) == \
+        [(tick, volume) for tick, volume in panel.scan_signals(day, 10, 1) if eligible[400, panel.ticker_id[tick]]]
+    # The rows rolled forward one bar at a time are the same as over the whole history
+    rolled = MarketPanel(panel.index[:500], panel.tickers,
+                         **{name: getattr(panel, name)[:500] for name in PANEL_FIELDS.values()})
+    rolled.signals(10, 1, liquidity=liquidity)
+    for row in range(500, 510):
+        rolled = rolled.roll(panel.index[row:row + 1],
+                             {name: getattr(panel, name)[row:row + 1] for name in PANEL_FIELDS.values()}, 256)
+    assert np.array_equal(rolled.signals(10, 1, liquidity=liquidity), signals[510 - 256:510])
+
@@ -0,0 +1,148 @@
+# -------------------------------------------------------------------------- #
+# Benchmark suite of the back-testing hot paths, on synthetic data only
+# -------------------------------------------------------------------------- #
+# Run from the repository root with:
+#   python -m tradecompanion.trading_packages.benchmarks --tickers 10,100,1000 --days 500,2500
+# --save writes the timings to a JSON file, --baseline compares them to a saved
+# file and exits with an error when a benchmark got slower than the tolerance.
+# Import Modules & Packages
+import argparse
+import json
+import sys
+import time
+import numpy as np
+import pandas as pd
+from . import portfolio as pf
+from .engine import BacktestEngine, Parameters
+from .profiling import PhaseTimer
+from .synthetic import synthetic_universe
+
+SAMPLE_TICKERS = 20  # Per-call indicator timings use a sample of the universe
+SAMPLE_DATES = 20
+KPI_RUNS = 100  # Number of equity curves scored by the KPI benchmarks
+
+
+# -------------------------------------------------------------------------- #
+# Helper functions
+# -------------------------------------------------------------------------- #
+def best_time(function, repeat: int = 3) -> float:
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# -------------------------------------------------------------------------- #
+# Benchmark functions, each one returns {benchmark name: seconds}
+# -------------------------------------------------------------------------- #
+def bench_indicators(equities: dict) -> dict:
+    # Seconds per call, with the windowed methods and with the precomputed columns
+    stocks = list(equities.values())[:SAMPLE_TICKERS]
+    dates = stocks[0].panel.dates[-SAMPLE_DATES:]
+    calls = {'Stock.signal': lambda stock, d: stock.signal(d, window=10, volume_margin=1),
+             'Stock.atr': lambda stock, d: stock.atr(d),
+             'Stock.moving_avg': lambda stock, d: stock.moving_avg(d)}
+    timings = {}
+    for precompute in (False, True):
+        for stock in stocks:
+            stock.precompute = precompute
+        for name, call in calls.items():
+            def run():
+                for stock in stocks:
+                    for d in dates:
+                        call(stock, d)
+            mode = 'precomputed' if precompute else 'windowed'
+            timings['{} ({})'.format(name, mode)] = best_time(run) / (len(stocks) * len(dates))
+    return timings
+
+
+def bench_engine(equities: dict) -> dict:
+    # One full run of the daily open/close loop, then the time spent in each phase
+    panel = next(iter(equities.values())).panel
+    profiler = PhaseTimer()
+    engine = BacktestEngine(equities, panel.dates[min(260, len(panel.dates) // 2)],
+                            parameters=Parameters(initial_cash=100000, risk_per_trade=0.005),
+                            profiler=profiler)
+    with profiler.phase('run'):
+        engine.run()
+    return {'engine ' + name: seconds for name, seconds in profiler.seconds.items()}
+
+
+def bench_kpis(n_days: int) -> dict:
+    rng = np.random.default_rng(0)
+    curves = 4000 * np.cumprod(1 + rng.normal(0.0004, 0.01, (KPI_RUNS, n_days)), axis=1)
+    series = [pd.Series(curve, index=pd.bdate_range('2010-01-04', periods=n_days)) for curve in curves]
+
+    def one_by_one():
+        for daily_value in series:
+            pf.cagr(daily_value)
+            pf.volatility(daily_value)
+            pf.sharpe(daily_value, rf=0.025)
+            pf.sortino(daily_value, rf=0.025)
+
+    def streaming():
+        for curve in curves:
+            kpi = pf.RunningKPI(rf=0.025)
+            for value in curve:
+                kpi.update(value)
+
+    return {'KPI functions': best_time(one_by_one),
+            'KPI RunningKPI': best_time(streaming, repeat=1),
+            'KPI batch_kpis': best_time(lambda: pf.batch_kpis(curves, rf=0.025))}
+
+
+def run_benchmarks(tickers: list, days: list) -> pd.DataFrame:
+    rows = []
+    for n_days in days:
+        for name, seconds in bench_kpis(n_days).items():
+            rows.append({'benchmark': name, 'tickers': KPI_RUNS, 'days': n_days, 'seconds': seconds})
+        for n_tickers in tickers:
+            start = time.perf_counter()
+            equities = synthetic_universe(n_tickers, n_days)
+            timings = {'data load': time.perf_counter() - start}
+            timings.update(bench_indicators(equities))
+            timings.update(bench_engine(equities))
+            for name, seconds in timings.items():
+                rows.append({'benchmark': name, 'tickers': n_tickers, 'days': n_days, 'seconds': seconds})
+    return pd.DataFrame(rows)
+
+
+# -------------------------------------------------------------------------- #
+# Function to compare timings to a saved baseline
+# -------------------------------------------------------------------------- #
+def compare(results: pd.DataFrame, baseline: pd.DataFrame, tolerance: float) -> pd.DataFrame:
+    keys = ['benchmark', 'tickers', 'days']
+    merged = results.merge(baseline, on=keys, suffixes=('', '_baseline'))
+    merged['ratio'] = merged['seconds'] / merged['seconds_baseline']
+    merged['regression'] = merged['ratio'] > 1 + tolerance
+    return merged
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the back-testing hot paths on synthetic data.')
+    parser.add_argument('--tickers', default='10,100,1000', help='comma separated universe sizes')
+    parser.add_argument('--days', default='500,2500', help='comma separated history lengths')
+    parser.add_argument('--save', help='JSON file to write the timings to')
+    parser.add_argument('--baseline', help='JSON file of saved timings to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown against the baseline')
+    args = parser.parse_args(argv)
+    results = run_benchmarks([int(n) for n in args.tickers.split(',')], [int(n) for n in args.days.split(',')])
+    pd.set_option('display.width', 200)
+    print(results.to_string(index=False))
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results.to_dict(orient='records'), f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = pd.DataFrame(json.load(f))
+        comparison = compare(results, baseline, args.tolerance)
+        print(comparison.to_string(index=False))
+        if comparison['regression'].any():
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+# -------------------------------------------------------------------------- #
+# Back-testing Engine module
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import datetime
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Callable
+import numpy as np
+import pandas as pd
+from . import portfolio as pf
+from .profiling import PhaseTimer
+from .recorder import EquityRecorder
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: strategy back-testing parameters
+# -------------------------------------------------------------------------- #
+@dataclass
+class Parameters(object):
+    risk_per_trade: float = 0.01  # % of portfolio value on each trade
+    risk_ratio: float = 2
+    cash_ratio: float = 0.01  # % of cash to maintain in the portfolio at all time
+    initial_cash: float = 4000
+    signal_window: int = 10
+    stop_margin_multiple: float = 1
+    atr_window: int = 14
+    vol_marg: float = 1
+    risk_free_rate: float = 0.025
+    # Liquidity prefilter of the daily scan, off while both thresholds are 0
+    liquidity_window: int = 20
+    min_dollar_volume: float = 0.0  # Average daily traded value over liquidity_window, in USD
+    min_price: float = 0.0
+
+
+# -------------------------------------------------------------------------- #
+# Default strategy hook: breakout signal of Stock.signal() ranked by Volume
+# -------------------------------------------------------------------------- #
+def signal_strategy(engine: 'BacktestEngine', data_date: datetime.date, exclude: list) -> list:
+    # Returns the (ticker, score) opportunities of data_date, the best one first
+    parameters = engine.parameters
+    liquidity = None
+    if parameters.min_dollar_volume > 0 or parameters.min_price > 0:
+        liquidity = (parameters.liquidity_window, parameters.min_dollar_volume, parameters.min_price)
+    return engine.panel.scan_signals(data_date, window=parameters.signal_window,
+                                     volume_margin=parameters.vol_marg, exclude=exclude, liquidity=liquidity)
+
+
+# -------------------------------------------------------------------------- #
+# Default sizing hook: ATR based risk of Portfolio.risk()
+# -------------------------------------------------------------------------- #
+def risk_sizing(engine: 'BacktestEngine', ticker: str, price: float, data_date: datetime.date) -> dict:
+    parameters = engine.parameters
+    stock_atr = engine.equities[ticker].atr(data_date=data_date, window=parameters.atr_window)
+    return engine.portfolio.risk(price=price, atr=stock_atr,
+                                 stop_margin=parameters.stop_margin_multiple,
+                                 risk_per_trade=parameters.risk_per_trade, risk_ratio=parameters.risk_ratio)
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: results of a back-test run
+# -------------------------------------------------------------------------- #
+@dataclass
+class BacktestResult(object):
+    portfolio: pf.Portfolio
+    trading_engine: pd.DataFrame
+    positions: pf.PositionBook
+    nb_of_wins: int = 0
+    nb_of_losses: int = 0
+
+    def log_df(self) -> pd.DataFrame:
+        return self.positions.frame()
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: event-driven back-testing engine over a loaded equities universe
+# -------------------------------------------------------------------------- #
+@dataclass
+class BacktestEngine(object):
+    equities: dict
+    start_trading_date: datetime.date
+    end_trading_date: datetime.date = None
+    parameters: Parameters = field(default_factory=Parameters)
+    strategy: Callable = signal_strategy
+    sizing: Callable = risk_sizing
+    on_day: Callable = None  # Called with (engine, data_date) at the end of every trading day
+    name: str = 'Momo'
+    profiler: PhaseTimer = None  # Opt-in, times every phase of the daily loop when given
+
+    def __post_init__(self):
+        # All stocks are views over one market panel sharing a single date index
+        self.panel = next(iter(self.equities.values())).panel
+
+    def phase(self, name: str):
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
+
+    def run(self) -> BacktestResult:
+        self.start()
+        # -------------------------------------------------------------------------- #
+        # Start looping over the Trading Window
+        # -------------------------------------------------------------------------- #
+        for day in range(self.first_day, self.last_day):
+            self.step(day)
+        return self.finish()
+
+    def start(self):
+        # A run starts from a fresh portfolio, so the same engine and data can be run many times
+        self.portfolio = pf.Portfolio(self.name, self.start_trading_date, cash_value=self.parameters.initial_cash)
+        self.book = pf.PositionBook(self.panel.tickers, self.panel.dates)
+        self.nb_of_wins = 0
+        self.nb_of_losses = 0
+        # Book days are panel rows plus day_offset, which a rolling panel (see session.py) moves forward
+        self.day_offset = 0
+        self.first_day = self.panel.position(self.start_trading_date)
+        self.last_day = len(self.panel.dates) if self.end_trading_date is None \
+            else self.panel.position(self.end_trading_date) + 1
+        self.recorder = EquityRecorder(self.panel.dates[self.first_day:self.last_day])
+        # Live KPIs of the run, updated with every recorded day
+        self.kpi = pf.RunningKPI(rf=self.parameters.risk_free_rate)
+
+    def snapshot(self, next_day: int) -> dict:
+        # State of a run in progress, the run carries on from next_day once restored
+        return {'next_day': next_day, 'portfolio': self.portfolio, 'book': self.book,
+                'recorder': self.recorder, 'kpi': self.kpi, 'nb_of_wins': self.nb_of_wins,
+                'nb_of_losses': self.nb_of_losses, 'first_day': self.first_day,
+                'last_day': self.last_day, 'day_offset': self.day_offset}
+
+    def restore(self, state: dict) -> int:
+        for name, value in state.items():
+            if name != 'next_day':
+                setattr(self, name, value)
+        return state['next_day']
+
+    def step(self, day: int):
+        # One trading day of the run, day is a row of the market panel
+        self.open_positions(day)
+        with self.phase('position closing'):
+            self.close_positions(day)
+        with self.phase('recording'):
+            self.record(day)
+        if self.on_day is not None:
+            with self.phase('on day hook'):
+                self.on_day(self, self.panel.dates[day])
+
+    def finish(self) -> BacktestResult:
+        # -------------------------------------------------------------------------- #
+        # Performance KPIs
+        # -------------------------------------------------------------------------- #
+        self.trading_engine = self.recorder.frame()
+        self.portfolio.cagr_KPI = self.kpi.cagr
+        self.portfolio.volatility_KPI = self.kpi.volatility
+        self.portfolio.sharpe_KPI = self.kpi.sharpe
+        self.portfolio.sortino_KPI = self.kpi.sortino
+        return BacktestResult(self.portfolio, self.trading_engine, self.book,
+                              nb_of_wins=self.nb_of_wins, nb_of_losses=self.nb_of_losses)
+
+    # -------------------------------------------------------------------------- #
+    # POSITION OPENING - PERFORMED BEFORE MARKET OPEN
+    # -------------------------------------------------------------------------- #
+    def open_positions(self, day: int):
+        portfolio = self.portfolio
+        parameters = self.parameters
+        previous_date = self.panel.dates[day - 1]
+        actual_cash_ratio = portfolio.cash_value / portfolio.total_value
+        # Verify if cash ratio condition is fulfilled and that we can afford to open a position
+        if actual_cash_ratio <= parameters.cash_ratio:
+            return
+        # Stocks with an open position are left out of the opportunities
+        with self.phase('signal scan'):
+            opportunities = self.strategy(self, previous_date, [self.panel.tickers[j] for j in self.book.open])
+        # For each opportunity, going from the best one, verify that we have enough cash to open it.
+        # If enough cash, open the position. If not skip it until all opportunities have been verified.
+        for opportunity, _ in opportunities:
+            ticker_id = self.panel.ticker_id[opportunity]
+            # Only one position per stock can be open at a time
+            if ticker_id in self.book.open:
+                continue
+            prev_close_price = self.panel.close[day - 1, ticker_id]
+            open_price = self.panel.open[day, ticker_id]
+            with self.phase('sizing'):
+                position_sizing = self.sizing(self, opportunity, prev_close_price, previous_date)
+            remaining_cash = portfolio.cash_value - position_sizing['shares_to_buy'] * prev_close_price
+            actual_cash_ratio = remaining_cash / portfolio.total_value
+            if actual_cash_ratio > parameters.cash_ratio \
+                    and prev_close_price <= open_price <= position_sizing['target_price']:
+                row = self.book.add(ticker_id=ticker_id, nb_shares=position_sizing['shares_to_buy'],
+                                    open_day=day + self.day_offset, open_price=open_price,
+                                    stop_loss=position_sizing['stop_price'],
+                                    target_price=position_sizing['target_price'])
+                portfolio.cash_value -= self.book.total_cost[row]
+                portfolio.market_value += self.book.market_value[row]
+                portfolio.total_value = portfolio.cash_value + portfolio.market_value
+
+    # -------------------------------------------------------------------------- #
+    # POSITION CLOSING AND PORTFOLIO VALUE UPDATE - PERFORMED AT THE END OF THE TRADING DAY
+    # -------------------------------------------------------------------------- #
+    def close_positions(self, day: int):
+        portfolio = self.portfolio
+        book = self.book
+        portfolio.market_value = 0  # Initialize portfolio market value
+        # Check all the open positions at once to see if we had to close some on the previous trading period
+        rows = book.open_rows()
+        if len(rows) == 0:
+            return
+        ticker_ids = book.ticker_id[rows]
+        stopped = book.stop_loss[rows] > self.panel.low[day, ticker_ids]
+        targeted = ~stopped & (book.target_price[rows] < self.panel.high[day, ticker_ids])
+        closed = stopped | targeted
+        if closed.any():
+            prices = np.where(stopped, book.stop_loss[rows], book.target_price[rows])
+            book.close_positions(rows[closed], prices[closed], day + self.day_offset)
+            for row in rows[closed]:
+                portfolio.cash_value += book.total_return[row]  # Update portfolio cash value
+                if book.realized_pnl[row] < 0:
+                    self.nb_of_losses += 1
+                else:
+                    self.nb_of_wins += 1
+        # The stop loss and target price of the remaining positions follow the moving average
+        held = rows[~closed]
+        held_ids = ticker_ids[~closed]
+        position_close_price = self.panel.close[day, held_ids]
+        reference_ma = self.panel.sma()[day, held_ids]
+        trailing = position_close_price > reference_ma
+        if trailing.any():
+            stock_atr = self.panel.atr(self.parameters.atr_window)[day, held_ids[trailing]]
+            book.stop_loss[held[trailing]] = reference_ma[trailing] - stock_atr
+            book.target_price[held[trailing]] = book.stop_loss[held[trailing]] * self.parameters.risk_ratio
+        # A ticker without a bar (halt or data gap) has no stop, target or trailing update above, as
+        # comparisons with NaN are false, and is valued at its last known close
+        gapped = np.isnan(position_close_price)
+        if gapped.any():
+            position_close_price[gapped] = [self.last_close(day, ticker_id, row)
+                                            for ticker_id, row in zip(held_ids[gapped], held[gapped])]
+        # Update portfolio market value
+        portfolio.market_value = sum((position_close_price * book.nb_shares[held]).tolist())
+
+    def last_close(self, day: int, ticker_id: int, row: int) -> float:
+        # Last close before day, or the open price when the panel has none
+        closes = self.panel.close[:day, ticker_id]
+        known = np.flatnonzero(~np.isnan(closes))
+        return closes[known[-1]] if len(known) else self.book.open_price[row]
+
+    # -------------------------------------------------------------------------- #
+    # UPDATING PORTFOLIO VALUE AND TRADING ENGINE
+    # -------------------------------------------------------------------------- #
+    def record(self, day: int):
+        portfolio = self.portfolio
+        data_date = self.panel.dates[day]
+        # Add a monthly contribution to the portfolio
+        # if data_date.month is not self.panel.dates[day - 1].month:
+        #    portfolio.cash_value += 150
+        # Here we update the portfolio total value after all transactions are done
+        portfolio.total_value = portfolio.market_value + portfolio.cash_value
+        # Trading engine update
+        self.recorder.record(day - self.first_day, portfolio.cash_value,
+                             portfolio.market_value, portfolio.total_value)
+        self.kpi.update(portfolio.total_value)
+
+
+# -------------------------------------------------------------------------- #
+# Function to run several portfolios together over one pass of the market panel
+# -------------------------------------------------------------------------- #
+def run_batch(engines: list) -> list:
+    # Each engine keeps its own portfolio, positions and equity curve, while the market
+    # panel and its indicator arrays are shared, so a day of data is read once for all of them
+    panel = engines[0].panel
+    if any(engine.panel is not panel for engine in engines):
+        raise ValueError('Every engine of a batch must run over the same market panel')
+    for engine in engines:
+        engine.start()
+    for day in range(min(engine.first_day for engine in engines), max(engine.last_day for engine in engines)):
+        for engine in engines:
+            if engine.first_day <= day < engine.last_day:
+                engine.step(day)
+    return [engine.finish() for engine in engines]
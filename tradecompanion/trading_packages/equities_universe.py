@@ -4,15 +4,14 @@
 
 # Import Modules & Packages
 import datetime
+import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
-import yfinance as yf
-from pandas_datareader import data as pdr
-from dataclasses import dataclass
-import requests
-from bs4 import BeautifulSoup
-
-# This method will override the original data reader method
-yf.pdr_override()
+from dataclasses import dataclass, field
+from . import indicators as ind
+from . import market_data as md
+from . import panel as pn
 
 
 # -------------------------------------------------------------------------- #
@@ -23,22 +22,65 @@ class Stock(object):
     ticker: str
     start_date: datetime.date
     end_date: datetime.date
+    precompute: bool = False
+    source: md.DataSource = field(default=None, repr=False, compare=False)
+    panel: pn.MarketPanel = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
-        self.ohcl = from_yahoo(self.ticker, self.start_date, self.end_date, r='1d')
-
-        self.open = self.ohcl['Open']
-        self.close = self.ohcl['Close']
-        self.high = self.ohcl['High']
-        self.low = self.ohcl['Low']
-        self.volume = self.ohcl['Volume']
+        # A stock is a view over one column of a market panel, a single-ticker panel is
+        # loaded when none is given. Yahoo! Finance is used when no other data provider is given.
+        if self.panel is None:
+            source = self.source if self.source is not None else md.YahooSource()
+            ohcl = source.fetch(self.ticker, self.start_date, self.end_date, r='1d')
+            self.panel = pn.MarketPanel.from_frames({self.ticker: ohcl})
+        self.attach(self.panel)
+
+    def attach(self, panel: pn.MarketPanel):
+        self.panel = panel
+        self.ticker_id = self.panel.ticker_id[self.ticker]
+
+        self.open = self.panel.series('Open', self.ticker)
+        self.close = self.panel.series('Close', self.ticker)
+        self.high = self.panel.series('High', self.ticker)
+        self.low = self.panel.series('Low', self.ticker)
+        self.volume = self.panel.series('Volume', self.ticker)
+
+        # Full-history indicator columns, filled on first use when precompute is enabled
+        self.indicators = {}
+
+    @property
+    def ohcl(self) -> pd.DataFrame:
+        return self.panel.frame(self.ticker)
+
+    def date_position(self, data_date: datetime.date) -> int:
+        return self.panel.position(data_date)
 
     def date_window_index(self, data_date: datetime.date, window: int) -> tuple:
-        data_ind = self.ohcl.index.get_loc(str(data_date))
+        data_ind = self.date_position(data_date)
         start_ind = data_ind - window + 1
         return data_ind, start_ind
 
+    def indicator(self, key: tuple, build) -> np.ndarray:
+        column = self.indicators.get(key)
+        if column is None:
+            column = self.indicators[key] = np.asarray(build())
+        return column
+
+    def precompute_indicators(self, signal_window: int = 20, atr_window: int = 14,
+                              ma_window: int = 50, volume_margin: float = 1.5):
+        self.precompute = True
+        self.indicator(('signal', signal_window, volume_margin),
+                       lambda: ind.rolling_signal(self.high, self.low, self.close, self.volume,
+                                                  window=signal_window, volume_margin=volume_margin))
+        self.indicator(('atr', atr_window), lambda: ind.rolling_atr(self.high, self.low, self.close, atr_window))
+        self.indicator(('sma', ma_window), lambda: ind.rolling_sma(self.close, ma_window))
+
     def atr(self, data_date: datetime.date, window: int = 14) -> float:
+        if self.precompute:
+            data_ind = self.date_position(data_date)
+            column = self.indicator(('atr', window),
+                                    lambda: ind.rolling_atr(self.high, self.low, self.close, window))
+            return column[data_ind]
         data_ind, start_ind = self.date_window_index(data_date, window)
         high = self.high.iloc[start_ind:data_ind + 1]
         low = self.low.iloc[start_ind:data_ind + 1]
@@ -54,6 +96,14 @@ class Stock(object):
         return atr
 
     def macd(self, data_date: datetime.date, short_p: int = 12, long_p: int = 26, mean_p: int = 9) -> tuple:
+        if self.precompute:
+            data_ind = self.date_position(data_date)
+            key = ('macd', short_p, long_p, mean_p)
+            if key not in self.indicators:
+                self.indicators[key] = ind.rolling_macd(self.close, short_p, long_p, mean_p)
+            signal_rows, bullish_column = self.indicators[key]
+            macd_signal = pd.Series(signal_rows[data_ind], index=self.close.index[data_ind - long_p:data_ind + 1])
+            return macd_signal, bool(bullish_column[data_ind])
         data_ind, start_ind = self.date_window_index(data_date, 2 * long_p)
         close = self.close.iloc[start_ind:data_ind + 1]
         macd_fast = close.ewm(span=short_p, min_periods=short_p).mean()
@@ -65,6 +115,11 @@ class Stock(object):
         return macd_signal, bullish
 
     def stochastics(self, data_date: datetime.date, window: int = 14):
+        if self.precompute:
+            data_ind = self.date_position(data_date)
+            column = self.indicator(('stochastics', window),
+                                    lambda: ind.rolling_stochastics(self.high, self.low, self.close, window))
+            return column[data_ind]
         data_ind, start_ind = self.date_window_index(data_date, window)
         highest_high = self.high.iloc[start_ind:data_ind + 1].max()
         lowest_low = self.low.iloc[start_ind:data_ind + 1].min()
@@ -73,6 +128,11 @@ class Stock(object):
         return stochastic_oscillator
 
     def moving_avg(self, data_date: datetime.date, window: int = 50, avg_type: str = 'sma') -> float:
+        if self.precompute:
+            data_ind = self.date_position(data_date)
+            rolling_ma = {'sma': ind.rolling_sma, 'ema': ind.rolling_ema}[avg_type]
+            column = self.indicator((avg_type, window), lambda: rolling_ma(self.close, window))
+            return column[data_ind]
         data_ind, start_ind = self.date_window_index(data_date, window)
         close = self.close.iloc[start_ind:data_ind + 1]
         ma = {
@@ -82,6 +142,16 @@ class Stock(object):
         return ma[avg_type]
 
     def signal(self, data_date: datetime.date, window: int = 20, volume_margin: float = 1.5) -> bool:
+        if self.precompute:
+            # The position is resolved first, the indicator columns follow the panel it points to
+            try:
+                data_ind = self.date_position(data_date)
+            except KeyError:
+                return False
+            column = self.indicator(('signal', window, volume_margin),
+                                    lambda: ind.rolling_signal(self.high, self.low, self.close, self.volume,
+                                                               window=window, volume_margin=volume_margin))
+            return bool(column[data_ind])
         try:
             data_ind, start_ind = self.date_window_index(data_date, window=window)
             # -------------------------------------------------------------------------- #
@@ -112,27 +182,62 @@ class Stock(object):
                              and volume_signal
                              and mov_avg_go_long
                              and overbought_signal)
-        except:
+        except (KeyError, IndexError):
+            # No bar on data_date or not enough history before it
             long_position = False
         return long_position
 
 
+# -------------------------------------------------------------------------- #
+# Function to load the OHCL data of a whole universe concurrently into a market panel
+# -------------------------------------------------------------------------- #
+def load_panel(tickers: list, start_date: datetime.date, end_date: datetime.date,
+               workers: int = 8, source: md.DataSource = None) -> pn.MarketPanel:
+    # Yahoo! Finance calls are rate limited and retried when no other data provider is given
+    if source is None:
+        source = md.RateLimitedSource(md.YahooSource())
+    frames = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(source.fetch, tick, start_date, end_date, r='1d'): tick
+                   for tick in tickers}
+        for future in as_completed(futures):
+            tick = futures[future]
+            try:
+                frames[tick] = future.result()
+            except Exception as error:
+                warnings.warn('Could not load {}: {!r}'.format(tick, error))
+    # Tickers keep the order of the tickers list. A ticker whose download raised is left out of the
+    # panel and listed in panel.failed, one that returned no bars gets a column of NaN.
+    panel = pn.MarketPanel.from_frames({tick: frames[tick] for tick in tickers if tick in frames})
+    panel.failed = [tick for tick in tickers if tick not in frames]
+    return panel
+
+
+# -------------------------------------------------------------------------- #
+# Function to load a whole universe of stocks concurrently
+# -------------------------------------------------------------------------- #
+def load_universe(tickers: list, start_date: datetime.date, end_date: datetime.date,
+                  workers: int = 8, source: md.DataSource = None, precompute: bool = False) -> dict:
+    panel = load_panel(tickers, start_date, end_date, workers=workers, source=source)
+    return {tick: Stock(tick, start_date, end_date, precompute=precompute, panel=panel)
+            for tick in panel.tickers}
+
+
 # -------------------------------------------------------------------------- #
 # Function to get stocks data from Yahoo! Finance
 # -------------------------------------------------------------------------- #
 def from_yahoo(tick: str, start_date: datetime.date,
                end_date: datetime.date = None, r: str = '1d') -> pd.DataFrame:
-    ohcl = pdr.get_data_yahoo(tick, start=start_date,
-                              end=end_date, interval=r)
-
-    assert isinstance(ohcl, pd.DataFrame)
-    return ohcl
+    return md.YahooSource().fetch(tick, start_date, end_date, r=r)
 
 
 # -------------------------------------------------------------------------- #
 # Function to web scrap tickers from wealthsimple halal portfolio
 # -------------------------------------------------------------------------- #
 def get_tick_wealth_simple() -> list:
+    # The scraping packages are only imported when scraping
+    import requests
+    from bs4 import BeautifulSoup
     ws_url = 'https://help.wealthsimple.com/hc/en-ca/articles/115011786167-What-stocks-are-included-in-the-Halal-Investing-portfolio-'
     ws_tik = []
     r = requests.get(ws_url)
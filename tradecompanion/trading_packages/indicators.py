@@ -0,0 +1,127 @@
+# -------------------------------------------------------------------------- #
+# Technical Indicators module
+# -------------------------------------------------------------------------- #
+# Full-history versions of the Stock indicators. Every function takes pandas
+# Series (one ticker) or DataFrames (one column per ticker) and returns one
+# value per row, so that a per-date lookup becomes a plain array read.
+# Import Modules & Packages
+import numpy as np
+import pandas as pd
+
+
+# -------------------------------------------------------------------------- #
+# Helper functions
+# -------------------------------------------------------------------------- #
+def window_view(values: np.ndarray, window: int) -> np.ndarray:
+    # Read-only (n, window, ...) view where row i holds values[i - window + 1:i + 1].
+    # The first window - 1 rows are padded with NaN as they lack a full history.
+    values = np.asarray(values, dtype=float)
+    padded = np.concatenate([np.full((window - 1,) + values.shape[1:], np.nan), values])
+    shape = (len(values), window) + values.shape[1:]
+    strides = (padded.strides[0],) + padded.strides
+    return np.lib.stride_tricks.as_strided(padded, shape=shape, strides=strides, writeable=False)
+
+
+def _wrap(like, values: np.ndarray):
+    if isinstance(like, pd.DataFrame):
+        return pd.DataFrame(values, index=like.index, columns=like.columns)
+    return pd.Series(values, index=like.index, name=like.name)
+
+
+# -------------------------------------------------------------------------- #
+# Functions to calculate the indicators over the whole history
+# -------------------------------------------------------------------------- #
+def true_range(high, low, close):
+    # Same definition as Stock.atr(): the index alignment in there pairs each
+    # high and low with the close of the same day
+    high_low = high - low
+    high_pc = np.abs(high - close)
+    low_pc = np.abs(low - close)
+    return np.maximum(np.maximum(high_low, high_pc), low_pc)
+
+
+def rolling_atr(high, low, close, window: int = 14):
+    # Stock.atr() drops the current day, so the average runs over the window - 1 previous days
+    return true_range(high, low, close).rolling(window - 1).mean().shift(1)
+
+
+def rolling_sma(close, window: int = 50):
+    return close.rolling(window=window).mean()
+
+
+def rolling_ema(close, window: int = 50):
+    # The ewm of Stock.moving_avg() restarts on every window, which makes it a
+    # weighted average of the last `window` closes with fixed weights
+    weights = (1 - 2 / (window + 1)) ** np.arange(window - 1, -1, -1)
+    weights /= weights.sum()
+    ema = np.tensordot(window_view(close.values, window), weights, axes=([1], [0]))
+    return _wrap(close, ema)
+
+
+def rolling_stochastics(high, low, close, window: int = 14):
+    highest_high = high.rolling(window).max()
+    lowest_low = low.rolling(window).min()
+    return (close - lowest_low) / (highest_high - lowest_low) * 100
+
+
+def rolling_macd(close: pd.Series, short_p: int = 12, long_p: int = 26, mean_p: int = 9) -> tuple:
+    # Replays the windowed calculation of Stock.macd() for every date at once:
+    # each column holds one trailing slice of 2 * long_p closes and the ewm runs down the columns
+    window = 2 * long_p
+    windows = pd.DataFrame(window_view(close.values, window).T)
+    macd_fast = windows.ewm(span=short_p, min_periods=short_p).mean()
+    macd_slow = windows.ewm(span=long_p, min_periods=long_p).mean()
+    macd = (macd_fast - macd_slow).iloc[long_p - 1:]
+    macd_signal = macd.ewm(span=mean_p, min_periods=mean_p).mean()
+    bullish = macd.iloc[-1].values > macd_signal.iloc[-1].values
+    # Dates without a full slice of history are left out
+    macd_signal = macd_signal.values.T.copy()
+    macd_signal[:window - 1] = np.nan
+    bullish[:window - 1] = False
+    return macd_signal, bullish
+
+
+def rolling_signal(high, low, close, volume, window: int = 20, volume_margin: float = 1.5):
+    # Price action signal
+    price_signal = high >= 0.99 * high.rolling(window - 1).max().shift(1)
+    # Volume action signal
+    volume_signal = volume > 0.99 * volume_margin * volume.rolling(window - 1).max().shift(1)
+    # Overbought signal
+    overbought_signal = rolling_stochastics(high, low, close) < 80
+    # Trend signal
+    mov_avg_go_long = close > rolling_sma(close, window=50)
+    return price_signal & volume_signal & mov_avg_go_long & overbought_signal
+
+
+# -------------------------------------------------------------------------- #
+# Functions to calculate the indicators of a single row, on (dates x tickers) arrays.
+# Same values as the rolling functions above, for rolling them forward one bar at a time.
+# -------------------------------------------------------------------------- #
+def atr_at(high: np.ndarray, low: np.ndarray, close: np.ndarray, row: int, window: int = 14) -> np.ndarray:
+    rows = slice(row - window + 1, row)
+    return true_range(high[rows], low[rows], close[rows]).mean(axis=0)
+
+
+def sma_at(close: np.ndarray, row: int, window: int = 50) -> np.ndarray:
+    return close[row - window + 1:row + 1].mean(axis=0)
+
+
+def stochastics_at(high: np.ndarray, low: np.ndarray, close: np.ndarray, row: int, window: int = 14) -> np.ndarray:
+    highest_high = high[row - window + 1:row + 1].max(axis=0)
+    lowest_low = low[row - window + 1:row + 1].min(axis=0)
+    return (close[row] - lowest_low) / (highest_high - lowest_low) * 100
+
+
+def signal_at(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray, row: int,
+              window: int = 20, volume_margin: float = 1.5) -> np.ndarray:
+    with np.errstate(invalid='ignore'):
+        price_signal = high[row] >= 0.99 * high[row - window + 1:row].max(axis=0)
+        volume_signal = volume[row] > 0.99 * volume_margin * volume[row - window + 1:row].max(axis=0)
+        overbought_signal = stochastics_at(high, low, close, row) < 80
+        mov_avg_go_long = close[row] > sma_at(close, row, window=50)
+    return price_signal & volume_signal & mov_avg_go_long & overbought_signal
+
+
+def dollar_volume_at(close: np.ndarray, volume: np.ndarray, row: int, window: int = 20) -> np.ndarray:
+    rows = slice(row - window + 1, row + 1)
+    return (close[rows] * volume[rows]).mean(axis=0)
@@ -0,0 +1,138 @@
+# -------------------------------------------------------------------------- #
+# Intraday Bars module
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import datetime
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from . import market_data as md
+from . import panel as pn
+from .equities_universe import Stock
+
+# One fixed-size record per bar, the timestamp is the exchange local time in nanoseconds
+BAR_DTYPE = np.dtype([('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+                      ('close', '<f8'), ('volume', '<f8')])
+BAR_COLUMNS = {'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'}
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: append-only bar files, one per ticker and interval, read through memory maps
+# -------------------------------------------------------------------------- #
+class BarStore(object):
+    def __init__(self, directory, interval: str = '5m'):
+        self.directory = Path(directory) / interval
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, tick: str) -> Path:
+        return self.directory / '{}.bars'.format(tick)
+
+    def bars(self, tick: str) -> np.ndarray:
+        # Read-only memory map of every stored bar, pages are only read from disk when touched
+        path = self.path(tick)
+        if not path.exists() or path.stat().st_size == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.memmap(path, dtype=BAR_DTYPE, mode='r')
+
+    def tickers(self) -> list:
+        return sorted(path.stem for path in self.directory.glob('*.bars'))
+
+    def span(self, tick: str) -> tuple:
+        bars = self.bars(tick)
+        if len(bars) == 0:
+            return None
+        return pd.Timestamp(int(bars[0]['time'])), pd.Timestamp(int(bars[-1]['time']))
+
+    def append(self, tick: str, ohcl: pd.DataFrame) -> int:
+        # Only the bars after the last stored one are written, so appending overlapping
+        # downloads is safe. Returns the number of bars written.
+        index = pd.DatetimeIndex(ohcl.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        records = np.empty(len(ohcl), dtype=BAR_DTYPE)
+        records['time'] = index.asi8
+        for column, name in BAR_COLUMNS.items():
+            records[name] = ohcl[column].values
+        records = records[np.argsort(records['time'], kind='stable')]
+        with self.lock:
+            bars = self.bars(tick)
+            if len(bars):
+                records = records[records['time'] > bars[-1]['time']]
+            del bars
+            with open(self.path(tick), 'ab') as f:
+                f.write(records.tobytes())
+        return len(records)
+
+    def ingest(self, source: md.DataSource, tick: str, start_date: datetime.date,
+               end_date: datetime.date = None) -> int:
+        # Downloads only what comes after the last stored bar
+        covered = self.span(tick)
+        if covered is not None:
+            start_date = max(pd.Timestamp(start_date), covered[1]).date()
+        return self.append(tick, source.fetch(tick, start_date, end_date, r=self.interval))
+
+    def locate(self, tick: str, when) -> int:
+        # Position of the first bar at or after when, a binary search over the memory map
+        return int(np.searchsorted(self.bars(tick)['time'], pd.Timestamp(when).value))
+
+    def frame(self, tick: str, first: int, last: int) -> pd.DataFrame:
+        # Copies the bars first to last (excluded) out of the memory map
+        bars = np.array(self.bars(tick)[max(first, 0):last])
+        index = pd.DatetimeIndex(bars['time'].astype('datetime64[ns]'), name='Date')
+        return pd.DataFrame({column: bars[name] for column, name in BAR_COLUMNS.items()}, index=index)
+
+    def read(self, tick: str, start_date, end_date=None, lookback: int = 0) -> pd.DataFrame:
+        # Bars from start_date (included) to end_date (excluded), plus the lookback bars before start_date
+        first = self.locate(tick, start_date) - lookback
+        last = len(self.bars(tick)) if end_date is None else self.locate(tick, end_date)
+        return self.frame(tick, first, last)
+
+    def load_panel(self, tickers: list, start_date, end_date=None, lookback: int = 0) -> pn.MarketPanel:
+        # Market panel of the date window only, whatever the length of the stored history
+        return pn.MarketPanel.from_frames({tick: self.read(tick, start_date, end_date, lookback=lookback)
+                                           for tick in tickers if self.span(tick) is not None})
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: stock over a sliding chunk of intraday bars, with the Stock indicator API
+# -------------------------------------------------------------------------- #
+@dataclass
+class IntradayStock(Stock):
+    store: BarStore = field(default=None, repr=False, compare=False)
+    lookback: int = 256  # Bars kept before the requested one, more than any indicator window
+    chunk: int = 4096  # Bars loaded after the requested one
+
+    def __post_init__(self):
+        self.warmup = 0
+        if self.panel is None:
+            self.load_chunk(self.start_date)
+        else:
+            self.attach(self.panel)
+
+    def load_chunk(self, data_date):
+        # Memory stays bounded by lookback + chunk bars, indicator columns are rebuilt per chunk
+        position = self.store.locate(self.ticker, data_date)
+        first = max(position - self.lookback, 0)
+        self.attach(pn.MarketPanel.from_frames(
+            {self.ticker: self.store.frame(self.ticker, first, position + self.chunk)}))
+        self.warmup = position - first
+
+    def date_position(self, data_date: datetime.date) -> int:
+        position = self.panel.date_pos.get(data_date)
+        if position is None or position < self.warmup:
+            self.load_chunk(data_date)
+        return self.panel.position(data_date)
+
+
+# -------------------------------------------------------------------------- #
+# Function to load an intraday universe over a date window, the stocks sharing one panel
+# -------------------------------------------------------------------------- #
+def load_intraday_universe(store: BarStore, tickers: list, start_date, end_date=None,
+                           lookback: int = 256, precompute: bool = False) -> dict:
+    panel = store.load_panel(tickers, start_date, end_date, lookback=lookback)
+    return {tick: Stock(tick, start_date, end_date, precompute=precompute, panel=panel)
+            for tick in panel.tickers}
@@ -0,0 +1,86 @@
+# -------------------------------------------------------------------------- #
+# Live View module
+# -------------------------------------------------------------------------- #
+# The equity curve is drawn by a separate process fed through a queue, so that
+# plotting never blocks the back-testing engine.
+# Import Modules & Packages
+import datetime
+import multiprocessing
+import queue
+import time
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: engine on_day hook streaming the portfolio value to the plotting process
+# -------------------------------------------------------------------------- #
+class LiveView(object):
+    def __init__(self, refresh_rate: float = 2.0, title: str = 'Portfolio total value'):
+        # refresh_rate is the number of figure updates per second of wall-clock time
+        self.interval = 1 / refresh_rate
+        # A spawned process does not inherit the GUI state of the engine process
+        context = multiprocessing.get_context('spawn')
+        self.queue = context.Queue()
+        self.process = context.Process(target=_plot_consumer, args=(self.queue, refresh_rate, title))
+        self.process.start()
+        self.buffer = []
+        self.last_flush = time.monotonic()
+
+    def __call__(self, engine, data_date: datetime.date):
+        # Points are sent in batches, at most once per refresh interval
+        self.buffer.append((data_date, engine.portfolio.total_value))
+        now = time.monotonic()
+        if now - self.last_flush >= self.interval:
+            self.flush()
+            self.last_flush = now
+
+    def flush(self):
+        if self.buffer:
+            self.queue.put(self.buffer)
+            self.buffer = []
+
+    def close(self, wait: bool = False):
+        # The figure stays open once the run is over, until its window is closed
+        self.flush()
+        self.queue.put(None)
+        if wait:
+            self.process.join()
+
+
+# -------------------------------------------------------------------------- #
+# Function run by the plotting process
+# -------------------------------------------------------------------------- #
+def _plot_consumer(points: multiprocessing.Queue, refresh_rate: float, title: str):
+    # matplotlib is only imported in the plotting process
+    import matplotlib.dates as mdates
+    import matplotlib.pyplot as plt
+
+    plt.ion()  # enable interactivity
+    fig, ax = plt.subplots()  # make a figure
+    ax.set_title(title)
+    ax.grid(axis='both')
+    ax.xaxis_date()
+    line, = ax.plot([], [])
+    dates = []
+    values = []
+    done = False
+    while not done:
+        # Only the points received since the last update are added to the curve
+        received = False
+        while True:
+            try:
+                batch = points.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                done = True
+                break
+            dates.extend(mdates.date2num(d) for d, _ in batch)
+            values.extend(v for _, v in batch)
+            received = True
+        if received:
+            line.set_data(dates, values)
+            ax.relim()
+            ax.autoscale_view()
+        plt.pause(1 / refresh_rate)
+    plt.ioff()
+    plt.show()
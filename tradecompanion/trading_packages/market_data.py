@@ -0,0 +1,202 @@
+# -------------------------------------------------------------------------- #
+# Market Data module
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import datetime
+import sqlite3
+import threading
+import time
+import warnings
+from contextlib import closing
+from pathlib import Path
+import pandas as pd
+
+OHCL_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: interface of every OHCL data provider
+# -------------------------------------------------------------------------- #
+class DataSource(object):
+    # Returns the OHCL bars of a ticker from start_date (included) to end_date (excluded)
+    def fetch(self, tick: str, start_date: datetime.date,
+              end_date: datetime.date = None, r: str = '1d') -> pd.DataFrame:
+        raise NotImplementedError
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: Yahoo! Finance data provider
+# -------------------------------------------------------------------------- #
+class YahooSource(DataSource):
+    def fetch(self, tick: str, start_date: datetime.date,
+              end_date: datetime.date = None, r: str = '1d') -> pd.DataFrame:
+        # yfinance is only imported once data is actually downloaded, most runs read a local store
+        import yfinance as yf
+        # Ticker.history is used instead of yf.download (behind pdr.get_data_yahoo), which shares
+        # module-level state between calls and is not safe to run from several threads
+        ohcl = yf.Ticker(tick).history(start=start_date, end=end_date, interval=r,
+                                       auto_adjust=False, actions=False)
+
+        assert isinstance(ohcl, pd.DataFrame)
+        return ohcl
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: local file-backed data provider (one <ticker>.csv per ticker)
+# -------------------------------------------------------------------------- #
+class CsvSource(DataSource):
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def fetch(self, tick: str, start_date: datetime.date,
+              end_date: datetime.date = None, r: str = '1d') -> pd.DataFrame:
+        ohcl = pd.read_csv(self.directory / '{}.csv'.format(tick), index_col=0, parse_dates=True)
+        ohcl.index.name = 'Date'
+        return date_slice(ohcl, start_date, end_date)
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: rate limits and retries the calls made to another data provider
+# -------------------------------------------------------------------------- #
+class RateLimitedSource(DataSource):
+    def __init__(self, source: DataSource, calls_per_second: float = 5.0,
+                 retries: int = 3, backoff: float = 1.0):
+        self.source = source
+        self.interval = 1 / calls_per_second
+        self.retries = retries
+        self.backoff = backoff  # Waiting time in seconds before the first retry, doubled on every retry
+        self.lock = threading.Lock()
+        self.next_call = 0.0
+
+    def wait_turn(self):
+        # Calls are spaced by a fixed interval, whatever the thread they come from
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def fetch(self, tick: str, start_date: datetime.date,
+              end_date: datetime.date = None, r: str = '1d') -> pd.DataFrame:
+        for attempt in range(self.retries + 1):
+            self.wait_turn()
+            try:
+                return self.source.fetch(tick, start_date, end_date, r=r)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: persistent SQLite store in front of another data provider
+# -------------------------------------------------------------------------- #
+class CachedSource(DataSource):
+    def __init__(self, source: DataSource, path, max_age: datetime.timedelta = datetime.timedelta(hours=12)):
+        self.source = source
+        self.path = Path(path)
+        self.max_age = max_age  # The bars after the stored ones are not asked for again before that
+        self.lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock, closing(sqlite3.connect(str(self.path))) as db, db:
+            db.execute('CREATE TABLE IF NOT EXISTS ohcl (ticker TEXT, interval TEXT, date TEXT, '
+                       'open REAL, high REAL, low REAL, close REAL, adj_close REAL, volume REAL, '
+                       'PRIMARY KEY (ticker, interval, date))')
+            db.execute('CREATE TABLE IF NOT EXISTS coverage (ticker TEXT, interval TEXT, '
+                       'start_date TEXT, end_date TEXT, PRIMARY KEY (ticker, interval))')
+            # Last time the source was asked for the bars up to end_date
+            db.execute('CREATE TABLE IF NOT EXISTS checks (ticker TEXT, interval TEXT, '
+                       'end_date TEXT, checked TEXT, PRIMARY KEY (ticker, interval))')
+
+    def fetch(self, tick: str, start_date: datetime.date,
+              end_date: datetime.date = None, r: str = '1d') -> pd.DataFrame:
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date if end_date is not None else datetime.date.today())
+        covered = self.coverage(tick, r)
+        # Only the date ranges that are not in the store yet are requested from the source.
+        # The stored range is kept contiguous, so a gap between it and the request is filled too.
+        if covered is None:
+            missing = [(start, end)]
+        else:
+            missing = []
+            if start < covered[0]:
+                missing.append((start, covered[0]))
+            if end > covered[1] and not self.checked_recently(tick, r, end):
+                missing.append((covered[1], end))
+        for gap_start, gap_end in missing:
+            try:
+                ohcl = self.source.fetch(tick, gap_start.date(), gap_end.date(), r=r)
+            except Exception as error:
+                # Offline, the stored bars are used as they are
+                if covered is None:
+                    raise
+                warnings.warn('Could not update {}, using the stored bars: {!r}'.format(tick, error))
+                break
+            self.store(tick, r, ohcl, gap_start, gap_end)
+            if gap_end == end:
+                self.execute('INSERT OR REPLACE INTO checks VALUES (?, ?, ?, ?)',
+                             (tick, r, str(end), datetime.datetime.now().isoformat()))
+        return self.load(tick, r, start, end)
+
+    def execute(self, query: str, values: tuple = ()) -> list:
+        with self.lock, closing(sqlite3.connect(str(self.path))) as db, db:
+            return db.execute(query, values).fetchall()
+
+    def checked_recently(self, tick: str, r: str, end: pd.Timestamp) -> bool:
+        # True when the bars up to end were asked for less than max_age ago
+        row = self.execute('SELECT end_date, checked FROM checks WHERE ticker = ? AND interval = ?', (tick, r))
+        return bool(row) and pd.Timestamp(row[0][0]) >= end and \
+            datetime.datetime.now() - datetime.datetime.fromisoformat(row[0][1]) < self.max_age
+
+    def coverage(self, tick: str, r: str = '1d') -> tuple:
+        with self.lock, closing(sqlite3.connect(str(self.path))) as db:
+            row = db.execute('SELECT start_date, end_date FROM coverage WHERE ticker = ? AND interval = ?',
+                             (tick, r)).fetchone()
+        if row is None:
+            return None
+        return pd.Timestamp(row[0]), pd.Timestamp(row[1])
+
+    def store(self, tick: str, r: str, ohcl: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp):
+        # Providers can return no bars, or stop early, when a download fails (yfinance does not raise):
+        # the range is only covered up to the last bar returned, the rest is requested again next time
+        ohcl = ohcl.reindex(columns=OHCL_COLUMNS)
+        index = pd.DatetimeIndex(ohcl.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        if len(index) == 0:
+            return
+        end = min(end, index.max() + pd.Timedelta(seconds=1))
+        dates = index.strftime('%Y-%m-%d %H:%M:%S')
+        rows = [(tick, r, d) + tuple(float(x) for x in values)
+                for d, values in zip(dates, ohcl.itertuples(index=False))]
+        with self.lock, closing(sqlite3.connect(str(self.path))) as db, db:
+            db.executemany('INSERT OR REPLACE INTO ohcl VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            row = db.execute('SELECT start_date, end_date FROM coverage WHERE ticker = ? AND interval = ?',
+                             (tick, r)).fetchone()
+            if row is not None:
+                start = min(start, pd.Timestamp(row[0]))
+                end = max(end, pd.Timestamp(row[1]))
+            db.execute('INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?)', (tick, r, str(start), str(end)))
+
+    def load(self, tick: str, r: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        with self.lock, closing(sqlite3.connect(str(self.path))) as db:
+            rows = db.execute('SELECT date, open, high, low, close, adj_close, volume FROM ohcl '
+                              'WHERE ticker = ? AND interval = ? AND date >= ? AND date < ? ORDER BY date',
+                              (tick, r, str(start), str(end))).fetchall()
+        ohcl = pd.DataFrame(rows, columns=['Date'] + OHCL_COLUMNS)
+        ohcl['Date'] = pd.to_datetime(ohcl['Date'])
+        return ohcl.set_index('Date')
+
+
+# -------------------------------------------------------------------------- #
+# Function to keep the bars of a data frame between two dates (end excluded)
+# -------------------------------------------------------------------------- #
+def date_slice(ohcl: pd.DataFrame, start_date: datetime.date = None,
+               end_date: datetime.date = None) -> pd.DataFrame:
+    keep = pd.Series(True, index=ohcl.index)
+    if start_date is not None:
+        keep &= ohcl.index >= pd.Timestamp(start_date)
+    if end_date is not None:
+        keep &= ohcl.index < pd.Timestamp(end_date)
+    return ohcl[keep.values]
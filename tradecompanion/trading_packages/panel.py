@@ -0,0 +1,189 @@
+# -------------------------------------------------------------------------- #
+# Market Panel module
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import datetime
+import hashlib
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from . import indicators as ind
+
+PANEL_FIELDS = {'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'}
+# One row of the cached indicator arrays, by the first item of their key
+ROW_INDICATORS = {
+    'signal': lambda panel, row, window, volume_margin: ind.signal_at(panel.high, panel.low, panel.close,
+                                                                      panel.volume, row, window, volume_margin),
+    'sma': lambda panel, row, window: ind.sma_at(panel.close, row, window),
+    'atr': lambda panel, row, window: ind.atr_at(panel.high, panel.low, panel.close, row, window),
+    'dollar_volume': lambda panel, row, window: ind.dollar_volume_at(panel.close, panel.volume, row, window),
+    'eligibility': lambda panel, row, window, min_dollar_volume, min_price: (
+        (ind.dollar_volume_at(panel.close, panel.volume, row, window) >= min_dollar_volume)
+        & (panel.close[row] >= min_price)),
+    'eligible_signal': lambda panel, row, window, volume_margin, *liquidity: (
+        ROW_INDICATORS['signal'](panel, row, window, volume_margin)
+        & ROW_INDICATORS['eligibility'](panel, row, *liquidity)),
+}
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: OHCL data of a whole universe on one shared date index
+# -------------------------------------------------------------------------- #
+class MarketPanel(object):
+    def __init__(self, index: pd.DatetimeIndex, tickers: list, open: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.index = index
+        # Daily bars are keyed by date, intraday bars by their full timestamp
+        self.dates = index.date if (index == index.normalize()).all() else index.to_pydatetime()
+        self.date_pos = {d: i for i, d in enumerate(self.dates)}
+        self.tickers = list(tickers)
+        self.ticker_id = {t: j for j, t in enumerate(self.tickers)}
+        # One (dates x tickers) array per field, stored column-major so that a ticker is contiguous
+        self.open = np.asfortranarray(open, dtype=float)
+        self.high = np.asfortranarray(high, dtype=float)
+        self.low = np.asfortranarray(low, dtype=float)
+        self.close = np.asfortranarray(close, dtype=float)
+        self.volume = np.asfortranarray(volume, dtype=float)
+        # Full-history (dates x tickers) indicator arrays, filled on first use
+        self.indicators = {}
+        self._fingerprint = None
+        self.failed = []  # Tickers that could not be downloaded, see equities_universe.load_panel()
+
+    @classmethod
+    def from_frames(cls, frames: dict) -> 'MarketPanel':
+        # Every ticker is aligned on the union of all dates, missing bars are NaN
+        index = pd.DatetimeIndex([], name='Date')
+        for ohcl in frames.values():
+            index = index.union(ohcl.index)
+        arrays = {}
+        for column, name in PANEL_FIELDS.items():
+            values = np.full((len(index), len(frames)), np.nan, order='F')
+            for j, ohcl in enumerate(frames.values()):
+                values[:, j] = ohcl[column].reindex(index).values
+            arrays[name] = values
+        return cls(index, list(frames), **arrays)
+
+    def save(self, directory):
+        # One .npy file per array, so that other processes can memory-map them with load()
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / 'index.npy', self.index.values)
+        np.save(directory / 'tickers.npy', np.array(self.tickers, dtype=str))
+        for name in PANEL_FIELDS.values():
+            np.save(directory / '{}.npy'.format(name), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory, mmap_mode: str = 'r') -> 'MarketPanel':
+        # With the default read-only mmap_mode, the OHCL arrays are shared through the OS page
+        # cache by every process loading the same directory instead of being copied
+        directory = Path(directory)
+        index = pd.DatetimeIndex(np.load(directory / 'index.npy'), name='Date')
+        tickers = np.load(directory / 'tickers.npy').tolist()
+        arrays = {name: np.load(directory / '{}.npy'.format(name), mmap_mode=mmap_mode)
+                  for name in PANEL_FIELDS.values()}
+        return cls(index, tickers, **arrays)
+
+    def roll(self, index: pd.DatetimeIndex, bars: dict, keep: int) -> 'MarketPanel':
+        # Panel of the last `keep` bars once the new bars are appended (one (len(index) x tickers)
+        # array per field in bars). The cached indicator arrays are moved forward with it and
+        # only their new rows are calculated.
+        arrays = {name: np.concatenate([getattr(self, name), bars[name]])[-keep:] for name in PANEL_FIELDS.values()}
+        rolled = MarketPanel(self.index.append(index)[-keep:], self.tickers, **arrays)
+        new_rows = range(len(rolled.dates) - len(index), len(rolled.dates))
+        for key, values in self.indicators.items():
+            if key[0] in ROW_INDICATORS:
+                rows = [ROW_INDICATORS[key[0]](rolled, row, *key[1:]) for row in new_rows]
+                rolled.indicators[key] = np.concatenate([values, rows])[-keep:]
+        return rolled
+
+    def fingerprint(self) -> str:
+        # Hash of the dates, tickers and OHCL arrays, identifies the data a run was made on
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(self.index.asi8.tobytes())
+            digest.update('\n'.join(self.tickers).encode())
+            for name in PANEL_FIELDS.values():
+                # The transpose of a column-major array is row-major, so no copy is made
+                digest.update(np.asfortranarray(getattr(self, name)).T)
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def position(self, data_date: datetime.date) -> int:
+        try:
+            return self.date_pos[data_date]
+        except KeyError:
+            return self.index.get_loc(str(data_date))
+
+    def indicator(self, key: tuple, build) -> np.ndarray:
+        values = self.indicators.get(key)
+        if values is None:
+            values = self.indicators[key] = np.asarray(build())
+        return values
+
+    def signals(self, window: int = 20, volume_margin: float = 1.5, liquidity: tuple = None) -> np.ndarray:
+        # Stock.signal() evaluated for every date and every ticker in one pass. With liquidity, the
+        # (window, min_dollar_volume, min_price) of eligibility(), the signal is only calculated for
+        # the tickers eligible on some date and is False wherever a ticker is not eligible.
+        if liquidity is None:
+            return self.indicator(('signal', window, volume_margin),
+                                  lambda: self.column_signals(slice(None), window, volume_margin))
+        return self.indicator(('eligible_signal', window, volume_margin) + tuple(liquidity),
+                              lambda: self.eligible_signals(window, volume_margin, liquidity))
+
+    def column_signals(self, columns, window: int, volume_margin: float) -> np.ndarray:
+        return np.asarray(ind.rolling_signal(pd.DataFrame(self.high[:, columns]), pd.DataFrame(self.low[:, columns]),
+                                             pd.DataFrame(self.close[:, columns]),
+                                             pd.DataFrame(self.volume[:, columns]),
+                                             window=window, volume_margin=volume_margin))
+
+    def eligible_signals(self, window: int, volume_margin: float, liquidity: tuple) -> np.ndarray:
+        eligible = self.eligibility(*liquidity)
+        columns = np.flatnonzero(eligible.any(axis=0))
+        values = np.zeros(eligible.shape, dtype=bool)
+        if len(columns):
+            values[:, columns] = self.column_signals(columns, window, volume_margin)
+        return values & eligible
+
+    def sma(self, window: int = 50) -> np.ndarray:
+        return self.indicator(('sma', window), lambda: ind.rolling_sma(pd.DataFrame(self.close), window))
+
+    def atr(self, window: int = 14) -> np.ndarray:
+        return self.indicator(('atr', window),
+                              lambda: ind.rolling_atr(pd.DataFrame(self.high), pd.DataFrame(self.low),
+                                                      pd.DataFrame(self.close), window))
+
+    def dollar_volume(self, window: int = 20) -> np.ndarray:
+        # Average daily traded value over the last `window` bars
+        return self.indicator(('dollar_volume', window),
+                              lambda: ind.rolling_sma(pd.DataFrame(self.close * self.volume), window))
+
+    def eligibility(self, window: int = 20, min_dollar_volume: float = 0.0, min_price: float = 0.0) -> np.ndarray:
+        # Tickers with a bar, a full `window` of history and enough liquidity, for every date
+        return self.indicator(('eligibility', window, min_dollar_volume, min_price),
+                              lambda: (self.dollar_volume(window) >= min_dollar_volume) & (self.close >= min_price))
+
+    def eligible_tickers(self, data_date: datetime.date, window: int = 20, min_dollar_volume: float = 0.0,
+                         min_price: float = 0.0) -> list:
+        eligible = self.eligibility(window, min_dollar_volume, min_price)[self.position(data_date)]
+        return [self.tickers[j] for j in np.flatnonzero(eligible)]
+
+    def scan_signals(self, data_date: datetime.date, window: int = 20, volume_margin: float = 1.5,
+                     exclude=(), liquidity: tuple = None) -> list:
+        # Returns the (ticker, volume) pairs with a long signal on data_date, highest volume first.
+        # Tickers in exclude (e.g. the ones with an open position) are skipped, and so are the
+        # ones that are not eligible when liquidity is given (see signals()).
+        day = self.position(data_date)
+        candidates = self.signals(window, volume_margin, liquidity)[day].copy()
+        for tick in exclude:
+            candidates[self.ticker_id[tick]] = False
+        ids = np.flatnonzero(candidates)
+        ranked = ids[np.argsort(-self.volume[day, ids], kind='stable')]
+        return [(self.tickers[j], self.volume[day, j]) for j in ranked]
+
+    def series(self, column: str, tick: str) -> pd.Series:
+        # Zero-copy view over the column of one ticker
+        values = getattr(self, PANEL_FIELDS[column])[:, self.ticker_id[tick]]
+        return pd.Series(values, index=self.index, name=column, copy=False)
+
+    def frame(self, tick: str) -> pd.DataFrame:
+        return pd.DataFrame({column: self.series(column, tick) for column in PANEL_FIELDS})
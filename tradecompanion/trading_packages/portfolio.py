@@ -3,11 +3,24 @@
 # -------------------------------------------------------------------------- #
 # Import Modules & Packages
 import datetime
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, fields
 import pandas as pd
 import numpy as np
 
 
+# -------------------------------------------------------------------------- #
+# Class decorator: rebuilds a dataclass with __slots__ (dataclass(slots=True) needs Python 3.10)
+# -------------------------------------------------------------------------- #
+def slotted(cls):
+    # Field defaults live in the generated __init__, so the class attributes holding them can go
+    names = tuple(f.name for f in fields(cls)) + getattr(cls, '__extra_slots__', ())
+    namespace = {key: value for key, value in cls.__dict__.items()
+                 if key not in names and key not in ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
 # -------------------------------------------------------------------------- #
 # Class definition: will represent a portfolio of stocks
 # -------------------------------------------------------------------------- #
@@ -41,9 +54,11 @@ class Portfolio(object):
 # -------------------------------------------------------------------------- #
 # Class definition: will represent a position in the market
 # -------------------------------------------------------------------------- #
+@slotted
 @dataclass
 class Position(object):
     fees = 4.95 / 1.3  # Commission fees in USD
+    __extra_slots__ = ('total_cost',)
 
     ticker: str
     nb_shares: int
@@ -71,6 +86,87 @@ class Position(object):
         self.realized_pnl = self.total_return - self.total_cost
 
 
+# -------------------------------------------------------------------------- #
+# Class definition: struct-of-arrays book of positions, one row per position
+# -------------------------------------------------------------------------- #
+class PositionBook(object):
+    columns = {'ticker_id': np.int32, 'nb_shares': np.int64, 'open_day': np.int32, 'close_day': np.int32,
+               'open_price': float, 'stop_loss': float, 'target_price': float, 'market_value': float,
+               'close_price': float, 'total_cost': float, 'total_return': float, 'realized_pnl': float,
+               'is_open': bool}
+
+    def __init__(self, tickers: list, dates: np.ndarray, capacity: int = 256):
+        # Tickers and days are stored as integer positions in these two sequences
+        self.tickers = tickers
+        self.dates = dates
+        self.size = 0
+        for name, dtype in PositionBook.columns.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self.open = {}  # Rows of the open positions by ticker id, in opening order
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, ticker_id: int, nb_shares: int, open_day: int, open_price: float,
+            stop_loss: float, target_price: float) -> int:
+        if self.size == len(self.is_open):
+            for name in PositionBook.columns:
+                column = getattr(self, name)
+                setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
+        row = self.size
+        self.size += 1
+        self.ticker_id[row] = ticker_id
+        self.nb_shares[row] = nb_shares
+        self.open_day[row] = open_day
+        self.close_day[row] = open_day
+        self.open_price[row] = open_price
+        self.stop_loss[row] = stop_loss
+        self.target_price[row] = target_price
+        self.total_cost[row] = open_price * nb_shares + Position.fees
+        self.market_value[row] = open_price * nb_shares
+        self.is_open[row] = True
+        self.open[ticker_id] = row
+        return row
+
+    def open_rows(self) -> np.ndarray:
+        return np.fromiter(self.open.values(), dtype=np.int64, count=len(self.open))
+
+    def close_positions(self, rows: np.ndarray, prices: np.ndarray, close_day: int):
+        # Position.close_position() applied to many rows at once
+        self.is_open[rows] = False
+        self.close_day[rows] = close_day
+        self.close_price[rows] = prices
+        self.market_value[rows] = prices * self.nb_shares[rows]
+        self.total_return[rows] = self.market_value[rows] - Position.fees
+        self.realized_pnl[rows] = self.total_return[rows] - self.total_cost[rows]
+        for ticker_id in self.ticker_id[rows]:
+            del self.open[ticker_id]
+
+    def position(self, row: int) -> Position:
+        position = Position(ticker=self.tickers[self.ticker_id[row]], nb_shares=int(self.nb_shares[row]),
+                            open_date=self.dates[self.open_day[row]], close_date=self.dates[self.close_day[row]],
+                            open_price=self.open_price[row], stop_loss=self.stop_loss[row],
+                            target_price=self.target_price[row], close_price=self.close_price[row],
+                            status='Open' if self.is_open[row] else 'Close',
+                            total_return=self.total_return[row], realized_pnl=self.realized_pnl[row])
+        position.market_value = self.market_value[row]
+        return position
+
+    def frame(self) -> pd.DataFrame:
+        # Trading log report, the numeric columns are views over the book
+        n = self.size
+        return pd.DataFrame({'ticker': np.asarray(self.tickers, dtype=object)[self.ticker_id[:n]],
+                             'Nb of Shares': self.nb_shares[:n],
+                             'Open Date': self.dates[self.open_day[:n]],
+                             'Close_date': self.dates[self.close_day[:n]],
+                             'Status': np.where(self.is_open[:n], 'Open', 'Close'),
+                             'Realized PnL': self.realized_pnl[:n],
+                             'Open Price': self.open_price[:n],
+                             'Stop Loss': self.stop_loss[:n],
+                             'Target Price': self.target_price[:n],
+                             'Close Price': self.close_price[:n]})
+
+
 # -------------------------------------------------------------------------- #
 # Function to calculate some KPIs
 # -------------------------------------------------------------------------- #
@@ -99,3 +195,115 @@ def sortino(daily_value: pd.Series, rf) -> float:
     neg_vol = chg.where(chg < 0).std() * np.sqrt(252)
     sr = (cagr(daily_value) - rf) / neg_vol
     return sr
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: KPIs updated in O(1) with every new daily value
+# -------------------------------------------------------------------------- #
+class RunningKPI(object):
+    def __init__(self, rf: float = 0.0, window: int = 21):
+        self.rf = rf
+        self.window = window  # Number of daily returns in the rolling KPIs
+        self.count = 0
+        self.first_value = np.nan
+        self.last_value = np.nan
+        # Welford accumulators of all the daily returns and of the negative ones
+        self.nb_returns = 0
+        self.mean_return = 0.0
+        self.m2_return = 0.0
+        self.nb_negative = 0
+        self.mean_negative = 0.0
+        self.m2_negative = 0.0
+        # Drawdown
+        self.peak = -np.inf
+        self.max_drawdown = 0.0
+        # Rolling window of the last daily values and returns
+        self.window_values = deque(maxlen=window + 1)
+        self.window_returns = deque(maxlen=window)
+        self.window_sum = 0.0
+        self.window_sum_sq = 0.0
+
+    def update(self, value: float):
+        # A missing value is carried forward the way pct_change() pads it: the day counts, with a zero return
+        if not np.isfinite(value):
+            if self.count == 0:
+                return
+            value = self.last_value
+        if self.count == 0:
+            self.first_value = value
+        else:
+            daily_ret = value / self.last_value - 1
+            self.nb_returns += 1
+            delta = daily_ret - self.mean_return
+            self.mean_return += delta / self.nb_returns
+            self.m2_return += delta * (daily_ret - self.mean_return)
+            if daily_ret < 0:
+                self.nb_negative += 1
+                delta = daily_ret - self.mean_negative
+                self.mean_negative += delta / self.nb_negative
+                self.m2_negative += delta * (daily_ret - self.mean_negative)
+            if len(self.window_returns) == self.window:
+                oldest = self.window_returns[0]
+                self.window_sum -= oldest
+                self.window_sum_sq -= oldest * oldest
+            self.window_returns.append(daily_ret)
+            self.window_sum += daily_ret
+            self.window_sum_sq += daily_ret * daily_ret
+        self.count += 1
+        self.last_value = value
+        self.window_values.append(value)
+        self.peak = max(self.peak, value)
+        self.max_drawdown = max(self.max_drawdown, 1 - value / self.peak)
+
+    @property
+    def cagr(self) -> float:
+        n = self.count / 252
+        return (self.last_value / self.first_value) ** (1 / n) - 1
+
+    @property
+    def volatility(self) -> float:
+        if self.nb_returns < 2:
+            return np.nan
+        return np.sqrt(self.m2_return / (self.nb_returns - 1)) * np.sqrt(252)
+
+    @property
+    def sharpe(self) -> float:
+        return (self.cagr - self.rf) / self.volatility
+
+    @property
+    def sortino(self) -> float:
+        if self.nb_negative < 2:
+            return np.nan
+        neg_vol = np.sqrt(self.m2_negative / (self.nb_negative - 1)) * np.sqrt(252)
+        return (self.cagr - self.rf) / neg_vol
+
+    @property
+    def rolling_return(self) -> float:
+        return self.window_values[-1] / self.window_values[0] - 1
+
+    @property
+    def rolling_volatility(self) -> float:
+        n = len(self.window_returns)
+        if n < 2:
+            return np.nan
+        variance = (self.window_sum_sq - self.window_sum * self.window_sum / n) / (n - 1)
+        return np.sqrt(max(variance, 0.0)) * np.sqrt(252)
+
+
+# -------------------------------------------------------------------------- #
+# Function to calculate the KPIs of many equity curves at once (one run per row)
+# -------------------------------------------------------------------------- #
+def batch_kpis(daily_values: np.ndarray, rf: float = 0.0) -> pd.DataFrame:
+    daily_values = np.atleast_2d(np.asarray(daily_values, dtype=float))
+    # Missing values are carried forward like pct_change() and RunningKPI.update() do
+    daily_values = pd.DataFrame(daily_values).ffill(axis=1).values
+    # The daily returns are computed once and shared by every KPI
+    daily_ret = daily_values[:, 1:] / daily_values[:, :-1] - 1
+    n = daily_values.shape[1] / 252
+    kpis = pd.DataFrame({'cagr': (daily_values[:, -1] / daily_values[:, 0]) ** (1 / n) - 1,
+                         'volatility': np.nanstd(daily_ret, axis=1, ddof=1) * np.sqrt(252)})
+    neg_vol = np.nanstd(np.where(daily_ret < 0, daily_ret, np.nan), axis=1, ddof=1) * np.sqrt(252)
+    kpis['sharpe'] = (kpis['cagr'] - rf) / kpis['volatility']
+    kpis['sortino'] = (kpis['cagr'] - rf) / neg_vol
+    kpis['max_drawdown'] = np.max(1 - daily_values / np.maximum.accumulate(daily_values, axis=1), axis=1)
+    return kpis
@@ -0,0 +1,31 @@
+# -------------------------------------------------------------------------- #
+# Profiling module
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+import pandas as pd
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: wall-clock time spent in each phase of a run
+# -------------------------------------------------------------------------- #
+class PhaseTimer(object):
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            self.calls[name] += 1
+
+    def report(self) -> pd.DataFrame:
+        report = pd.DataFrame({'seconds': pd.Series(self.seconds), 'calls': pd.Series(self.calls)})
+        report['share'] = report['seconds'] / report['seconds'].sum()
+        return report.sort_values(by='seconds', ascending=False)
@@ -0,0 +1,26 @@
+# -------------------------------------------------------------------------- #
+# Results Recorder module
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import numpy as np
+import pandas as pd
+
+EQUITY_COLUMNS = ['Portfolio cash value', 'Portfolio market value', 'Portfolio total value']
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: daily portfolio values in one preallocated float64 array
+# -------------------------------------------------------------------------- #
+class EquityRecorder(object):
+    def __init__(self, dates: np.ndarray):
+        self.dates = dates
+        # One row per trading day, one column per EQUITY_COLUMNS entry
+        self.values = np.full((len(dates), len(EQUITY_COLUMNS)), np.nan)
+
+    def record(self, row: int, cash_value: float, market_value: float, total_value: float):
+        self.values[row] = cash_value, market_value, total_value
+
+    def frame(self) -> pd.DataFrame:
+        # The data frame is a view over the recorded array, no copy is made
+        return pd.DataFrame(self.values, index=self.dates, columns=EQUITY_COLUMNS, copy=False)
+
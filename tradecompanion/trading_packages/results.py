@@ -0,0 +1,130 @@
+# -------------------------------------------------------------------------- #
+# Results Store module
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import datetime
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+from contextlib import closing
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable
+from .engine import BacktestEngine, BacktestResult, Parameters, signal_strategy, risk_sizing
+from .panel import MarketPanel
+
+
+# -------------------------------------------------------------------------- #
+# Functions to build the key of a run: its settings and a hash of its data
+# -------------------------------------------------------------------------- #
+def run_key(panel: MarketPanel, parameters: Parameters, start_trading_date: datetime.date,
+            end_trading_date: datetime.date = None, name: str = 'Momo',
+            strategy: Callable = signal_strategy, sizing: Callable = risk_sizing) -> str:
+    settings = {'parameters': asdict(parameters), 'start': str(start_trading_date), 'end': str(end_trading_date),
+                'name': name, 'strategy': '{}.{}'.format(strategy.__module__, strategy.__qualname__),
+                'sizing': '{}.{}'.format(sizing.__module__, sizing.__qualname__), 'data': panel.fingerprint()}
+    return hashlib.blake2b(json.dumps(settings, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def engine_key(engine: BacktestEngine) -> str:
+    return run_key(engine.panel, engine.parameters, engine.start_trading_date, engine.end_trading_date,
+                   name=engine.name, strategy=engine.strategy, sizing=engine.sizing)
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: SQLite store of run checkpoints and completed run results
+# -------------------------------------------------------------------------- #
+class ResultStore(object):
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock, closing(sqlite3.connect(str(self.path))) as db, db:
+            # A completed run has its KPIs, and its pickled BacktestResult unless it comes from a sweep
+            db.execute('CREATE TABLE IF NOT EXISTS runs (key TEXT PRIMARY KEY, settings TEXT, '
+                       'kpis TEXT, result BLOB, created TEXT)')
+            db.execute('CREATE TABLE IF NOT EXISTS checkpoints (key TEXT PRIMARY KEY, next_day INTEGER, '
+                       'state BLOB, created TEXT)')
+
+    def execute(self, query: str, values: tuple = ()) -> list:
+        with self.lock, closing(sqlite3.connect(str(self.path))) as db, db:
+            return db.execute(query, values).fetchall()
+
+    # -------------------------------------------------------------------------- #
+    # Completed runs
+    # -------------------------------------------------------------------------- #
+    def save_result(self, key: str, kpis: dict, result: BacktestResult = None, settings: dict = None):
+        blob = None if result is None else pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        self.execute('INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)',
+                     (key, json.dumps(settings or {}, default=str), json.dumps(kpis), blob,
+                      datetime.datetime.now().isoformat()))
+
+    def result(self, key: str) -> BacktestResult:
+        rows = self.execute('SELECT result FROM runs WHERE key = ?', (key,))
+        if not rows or rows[0][0] is None:
+            return None
+        return pickle.loads(rows[0][0])
+
+    def kpis(self, keys: list) -> dict:
+        # KPIs of the completed runs among keys, by key
+        found = {}
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows = self.execute('SELECT key, kpis FROM runs WHERE key IN ({})'.format(','.join('?' * len(chunk))),
+                                tuple(chunk))
+            found.update((key, json.loads(kpis)) for key, kpis in rows)
+        return found
+
+    # -------------------------------------------------------------------------- #
+    # Checkpoints of the runs in progress
+    # -------------------------------------------------------------------------- #
+    def save_checkpoint(self, key: str, state: dict):
+        self.execute('INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?)',
+                     (key, state['next_day'], pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL),
+                      datetime.datetime.now().isoformat()))
+
+    def checkpoint(self, key: str) -> dict:
+        rows = self.execute('SELECT state FROM checkpoints WHERE key = ?', (key,))
+        return pickle.loads(rows[0][0]) if rows else None
+
+    def drop_checkpoint(self, key: str):
+        self.execute('DELETE FROM checkpoints WHERE key = ?', (key,))
+
+    # -------------------------------------------------------------------------- #
+    # Function to run an engine from the cache, from its last checkpoint or from the start
+    # -------------------------------------------------------------------------- #
+    def run(self, engine: BacktestEngine, every: int = 250) -> BacktestResult:
+        # The engine state is saved every `every` trading days, an interrupted run is
+        # resumed from its last checkpoint the next time it is run
+        key = engine_key(engine)
+        cached = self.result(key)
+        if cached is not None:
+            return cached
+        engine.start()
+        state = self.checkpoint(key)
+        next_day = engine.first_day if state is None else engine.restore(state)
+        for day in range(next_day, engine.last_day):
+            engine.step(day)
+            if (day + 1 - engine.first_day) % every == 0 and day + 1 < engine.last_day:
+                self.save_checkpoint(key, engine.snapshot(day + 1))
+        result = engine.finish()
+        self.save_result(key, result_kpis(result), result,
+                         settings={'parameters': asdict(engine.parameters), 'name': engine.name,
+                                   'start': engine.start_trading_date, 'end': engine.end_trading_date})
+        self.drop_checkpoint(key)
+        return result
+
+
+# -------------------------------------------------------------------------- #
+# Function to get the KPIs of a run result
+# -------------------------------------------------------------------------- #
+def result_kpis(result: BacktestResult) -> dict:
+    return {'cagr': result.portfolio.cagr_KPI,
+            'volatility': result.portfolio.volatility_KPI,
+            'sharpe': result.portfolio.sharpe_KPI,
+            'sortino': result.portfolio.sortino_KPI,
+            'total_value': result.portfolio.total_value,
+            'nb_of_wins': result.nb_of_wins,
+            'nb_of_losses': result.nb_of_losses}
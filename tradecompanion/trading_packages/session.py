@@ -0,0 +1,210 @@
+# -------------------------------------------------------------------------- #
+# Live / Paper Trading Session module
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import datetime
+import os
+import pickle
+import warnings
+from pathlib import Path
+from typing import Callable
+import numpy as np
+import pandas as pd
+from . import equities_universe as eu
+from . import market_data as md
+from .engine import BacktestEngine, Parameters, signal_strategy, risk_sizing
+from .panel import MarketPanel, PANEL_FIELDS
+from .recorder import EQUITY_COLUMNS
+
+STATE_FILE = 'session.pkl'
+MAX_FAILED_UPDATES = 3  # Updates a ticker can fail in a row before the session goes on without its bars
+
+
+# -------------------------------------------------------------------------- #
+# Functions to keep some rows of a market panel
+# -------------------------------------------------------------------------- #
+def panel_tail(panel: MarketPanel, rows: int) -> MarketPanel:
+    return panel_rows(panel, slice(-rows, None))
+
+
+def panel_rows(panel: MarketPanel, rows: slice) -> MarketPanel:
+    return MarketPanel(panel.index[rows], panel.tickers,
+                       **{name: getattr(panel, name)[rows] for name in PANEL_FIELDS.values()})
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: stocks over the session panel, only created for the tickers asked for
+# -------------------------------------------------------------------------- #
+class StockViews(dict):
+    def __init__(self, panel: MarketPanel):
+        super().__init__()
+        self.panel = panel
+
+    def __missing__(self, tick: str) -> eu.Stock:
+        stock = self[tick] = eu.Stock(tick, None, None, precompute=True, panel=self.panel)
+        return stock
+
+    def move_to(self, panel: MarketPanel):
+        self.panel = panel
+        self.clear()
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: persistent trading session, moved forward one bar at a time
+# -------------------------------------------------------------------------- #
+class TradingSession(object):
+    # Only the last `lookback` bars of the universe are kept: more than any indicator window, so
+    # the indicators of a new bar are the same as in a back-test over the whole history, at a
+    # cost that does not grow with the length of the session
+    def __init__(self, directory, engine: BacktestEngine, calendar: list, equity: list,
+                 lookback: int = 256, source: md.DataSource = None, workers: int = 8,
+                 failed_updates: dict = None):
+        self.directory = Path(directory)
+        self.engine = engine
+        self.calendar = calendar  # Every trading day of the session, the book days index into it
+        self.equity = equity  # One (date, cash, market, total) tuple per trading day
+        self.lookback = lookback
+        self.source = source
+        self.workers = workers
+        self.failed_updates = failed_updates or {}  # Number of updates in a row each ticker failed to download
+
+    @classmethod
+    def start(cls, directory, tickers: list, parameters: Parameters = None, lookback: int = 256,
+              source: md.DataSource = None, workers: int = 8, name: str = 'Momo',
+              strategy: Callable = signal_strategy, sizing: Callable = risk_sizing) -> 'TradingSession':
+        # New session with a fresh portfolio, trading from the next bar on
+        today = datetime.date.today()
+        history_start = today - datetime.timedelta(days=lookback * 7 // 5 + 14)
+        panel = panel_tail(eu.load_panel(tickers, history_start, today, workers=workers, source=source), lookback)
+        engine = cls.make_engine(panel, parameters or Parameters(), name, strategy, sizing)
+        engine.start()
+        session = cls(directory, engine, list(panel.dates), [], lookback=lookback, source=source, workers=workers)
+        session.engine.book.dates = np.array(session.calendar, dtype=object)
+        return session
+
+    @classmethod
+    def from_engine(cls, directory, engine: BacktestEngine, lookback: int = 256,
+                    source: md.DataSource = None, workers: int = 8) -> 'TradingSession':
+        # Carries on a finished back-test (e.g. to paper trade from where it ended)
+        calendar = list(engine.panel.dates[:engine.last_day])
+        panel = panel_tail(MarketPanel(engine.panel.index[:engine.last_day], engine.panel.tickers,
+                                       **{name: getattr(engine.panel, name)[:engine.last_day]
+                                          for name in PANEL_FIELDS.values()}), lookback)
+        live = cls.make_engine(panel, engine.parameters, engine.name, engine.strategy, engine.sizing)
+        live.portfolio, live.book, live.kpi = engine.portfolio, engine.book, engine.kpi
+        live.nb_of_wins, live.nb_of_losses = engine.nb_of_wins, engine.nb_of_losses
+        live.day_offset = len(calendar) - len(panel.dates)
+        equity = [(d,) + tuple(values) for d, values in zip(engine.recorder.dates, engine.recorder.values.tolist())]
+        return cls(directory, live, calendar, equity, lookback=lookback, source=source, workers=workers)
+
+    @classmethod
+    def load(cls, directory, source: md.DataSource = None, workers: int = 8,
+             strategy: Callable = signal_strategy, sizing: Callable = risk_sizing) -> 'TradingSession':
+        with open(Path(directory) / STATE_FILE, 'rb') as f:
+            state = pickle.load(f)
+        panel = MarketPanel(state['index'], state['tickers'], **state['arrays'])
+        panel.indicators = state['indicators']
+        engine = cls.make_engine(panel, state['parameters'], state['portfolio'].name, strategy, sizing)
+        engine.portfolio, engine.book, engine.kpi = state['portfolio'], state['book'], state['kpi']
+        engine.nb_of_wins, engine.nb_of_losses = state['nb_of_wins'], state['nb_of_losses']
+        engine.day_offset = len(state['calendar']) - len(panel.dates)
+        return cls(directory, engine, state['calendar'], state['equity'], lookback=state['lookback'],
+                   source=source, workers=workers, failed_updates=state.get('failed_updates'))
+
+    @staticmethod
+    def make_engine(panel: MarketPanel, parameters: Parameters, name: str,
+                    strategy: Callable, sizing: Callable) -> BacktestEngine:
+        equities = StockViews(panel)
+        equities[panel.tickers[0]]  # The engine finds the panel through its first stock
+        return BacktestEngine(equities, panel.dates[-1], parameters=parameters, strategy=strategy,
+                              sizing=sizing, name=name)
+
+    def save(self):
+        engine = self.engine
+        panel = engine.panel
+        state = {'index': panel.index, 'tickers': panel.tickers,
+                 'arrays': {name: getattr(panel, name) for name in PANEL_FIELDS.values()},
+                 'indicators': panel.indicators,
+                 'parameters': engine.parameters, 'portfolio': engine.portfolio, 'book': engine.book,
+                 'kpi': engine.kpi, 'nb_of_wins': engine.nb_of_wins, 'nb_of_losses': engine.nb_of_losses,
+                 'calendar': self.calendar, 'equity': self.equity, 'lookback': self.lookback,
+                 'failed_updates': self.failed_updates}
+        # Written next to the previous state then swapped in, so a crash never leaves a partial file
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.directory / (STATE_FILE + '.tmp')
+        with open(temporary, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self.directory / STATE_FILE)
+
+    def append_bars(self, bars: MarketPanel) -> list:
+        # Adds the bars after the last session day to the rolling panel, returns their rows
+        panel = self.engine.panel
+        new = bars.index > pd.Timestamp(self.calendar[-1])
+        if not new.any():
+            return []
+        # Tickers missing from bars get NaN bars
+        pairs = [(panel.ticker_id[tick], j) for tick, j in bars.ticker_id.items() if tick in panel.ticker_id]
+        columns, bar_columns = [i for i, _ in pairs], [j for _, j in pairs]
+        rows = {}
+        for name in PANEL_FIELDS.values():
+            rows[name] = np.full((new.sum(), len(panel.tickers)), np.nan)
+            rows[name][:, columns] = getattr(bars, name)[new][:, bar_columns]
+        # The indicators of the new bars are calculated from the cached ones, not over the whole panel
+        rolled = panel.roll(bars.index[new], rows, self.lookback)
+        self.engine.equities.move_to(rolled)
+        self.engine.panel = rolled
+        self.calendar.extend(bars.dates[new])
+        self.engine.book.dates = np.array(self.calendar, dtype=object)
+        self.engine.day_offset = len(self.calendar) - len(rolled.dates)
+        return list(range(len(rolled.dates) - new.sum(), len(rolled.dates)))
+
+    def step(self, day: int):
+        # The opening and closing logic of the engine for one new bar
+        engine = self.engine
+        portfolio = engine.portfolio
+        engine.open_positions(day)
+        engine.close_positions(day)
+        portfolio.total_value = portfolio.market_value + portfolio.cash_value
+        engine.kpi.update(portfolio.total_value)
+        self.equity.append((engine.panel.dates[day], portfolio.cash_value,
+                            portfolio.market_value, portfolio.total_value))
+
+    def ingest(self, bars: MarketPanel) -> list:
+        # Runs every new bar of bars, then saves the session. Returns the traded dates.
+        # The bars are appended one date at a time, so that each one has the lookback bars before
+        # it in the rolling panel however many dates an update brings.
+        traded = []
+        for row in range(len(bars.dates)):
+            for day in self.append_bars(panel_rows(bars, slice(row, row + 1))):
+                self.step(day)
+                traded.append(self.engine.panel.dates[day])
+        if traded:
+            self.save()
+        return traded
+
+    def update(self, end_date: datetime.date = None) -> list:
+        # Only the bars after the last session day are downloaded, up to yesterday's by default
+        # (end_date is excluded) as the bar of the current day is not final before the close
+        start_date = self.calendar[-1] + datetime.timedelta(days=1)
+        end_date = end_date if end_date is not None else datetime.date.today()
+        if start_date >= end_date:
+            return []
+        bars = eu.load_panel(self.engine.panel.tickers, start_date, end_date,
+                             workers=self.workers, source=self.source)
+        # A ticker whose download failed would get NaN bars that are never downloaded again, so the
+        # session waits and the same bars are requested on the next update. A ticker failing
+        # MAX_FAILED_UPDATES updates in a row no longer holds the session back.
+        self.failed_updates = {tick: self.failed_updates.get(tick, 0) + 1 for tick in bars.failed}
+        waiting = [tick for tick, count in self.failed_updates.items() if count < MAX_FAILED_UPDATES]
+        if waiting:
+            warnings.warn('Session not updated, could not download {}'.format(', '.join(waiting)))
+            self.save()
+            return []
+        return self.ingest(bars)
+
+    def equity_curve(self) -> pd.DataFrame:
+        return pd.DataFrame([values for _, *values in self.equity], columns=EQUITY_COLUMNS,
+                            index=pd.Index([d for d, *_ in self.equity], name='Date'))
+
+    def log_df(self) -> pd.DataFrame:
+        return self.engine.book.frame()
@@ -0,0 +1,151 @@
+# -------------------------------------------------------------------------- #
+# Parameter Sweep module
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import datetime
+import itertools
+import os
+import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+import pandas as pd
+from . import equities_universe as eu
+from .engine import BacktestEngine, Parameters, run_batch
+from .panel import MarketPanel
+from .results import ResultStore, result_kpis, run_key
+
+KPI_COLUMNS = ['cagr', 'volatility', 'sharpe', 'sortino', 'total_value', 'nb_of_wins', 'nb_of_losses']
+
+# Equities universe of a worker process, loaded once by _attach_panel()
+_worker_equities = {}
+
+
+# -------------------------------------------------------------------------- #
+# Functions to build the parameter combinations of a sweep
+# -------------------------------------------------------------------------- #
+def parameter_grid(space: dict) -> list:
+    # Every combination of the values listed for each parameter
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+
+def random_search(space: dict, n: int, seed: int = None) -> list:
+    # A list of values is sampled from, a (low, high) tuple is drawn uniformly
+    # (as an integer when both bounds are integers)
+    rng = random.Random(seed)
+    combinations = []
+    for _ in range(n):
+        combination = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    combination[name] = rng.randint(low, high)
+                else:
+                    combination[name] = rng.uniform(low, high)
+            else:
+                combination[name] = rng.choice(values)
+        combinations.append(combination)
+    return combinations
+
+
+# -------------------------------------------------------------------------- #
+# Worker process functions
+# -------------------------------------------------------------------------- #
+def _attach_panel(directory: str):
+    # The panel arrays are memory-mapped, not pickled, so every worker reads the same pages
+    global _worker_equities
+    panel = MarketPanel.load(directory)
+    _worker_equities = {tick: eu.Stock(tick, None, None, precompute=True, panel=panel)
+                        for tick in panel.tickers}
+
+
+def _run_chunk(tasks: list) -> list:
+    # The combinations of a chunk are back-tested together in one pass over the panel
+    engines = []
+    for combination, start_trading_date, end_trading_date, base in tasks:
+        parameters = Parameters(**{**asdict(base), **combination})
+        engines.append(BacktestEngine(_worker_equities, start_trading_date, end_trading_date,
+                                      parameters=parameters))
+    return [{**combination, **result_kpis(result)}
+            for (combination, _, _, _), result in zip(tasks, run_batch(engines))]
+
+
+def _run_many(panel: MarketPanel, tasks: list, workers: int = None, store: ResultStore = None) -> list:
+    # With a result store, the tasks already back-tested on the same data are read from it and
+    # every finished chunk is saved to it, so an interrupted sweep resumes where it stopped
+    keys, done = [], {}
+    if store is not None:
+        keys = [run_key(panel, Parameters(**{**asdict(base), **combination}), start_trading_date, end_trading_date)
+                for combination, start_trading_date, end_trading_date, base in tasks]
+        done = store.kpis(keys)
+    rows = {i: {**tasks[i][0], **done[key]} for i, key in enumerate(keys) if key in done}
+    missing = [i for i in range(len(tasks)) if i not in rows]
+    if missing:
+        workers = workers or os.cpu_count()
+        size = max(1, -(-len(missing) // (4 * workers)))
+        chunks = [missing[i:i + size] for i in range(0, len(missing), size)]
+        with tempfile.TemporaryDirectory() as directory:
+            panel.save(directory)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_panel,
+                                     initargs=(directory,)) as executor:
+                results = executor.map(_run_chunk, [[tasks[i] for i in chunk] for chunk in chunks])
+                for chunk, chunk_rows in zip(chunks, results):
+                    for i, row in zip(chunk, chunk_rows):
+                        rows[i] = row
+                        if store is not None:
+                            combination, start_trading_date, end_trading_date, _ = tasks[i]
+                            store.save_result(keys[i], {kpi: row[kpi] for kpi in KPI_COLUMNS},
+                                              settings={'combination': combination, 'start': start_trading_date,
+                                                        'end': end_trading_date})
+    return [rows[i] for i in range(len(tasks))]
+
+
+# -------------------------------------------------------------------------- #
+# Function to back-test every parameter combination over a process pool
+# -------------------------------------------------------------------------- #
+def run_sweep(panel: MarketPanel, start_trading_date: datetime.date, combinations: list,
+              end_trading_date: datetime.date = None, workers: int = None,
+              base: Parameters = None, store: ResultStore = None) -> pd.DataFrame:
+    # Parameters missing from a combination keep the value they have in base
+    base = base if base is not None else Parameters()
+    tasks = [(combination, start_trading_date, end_trading_date, base) for combination in combinations]
+    return pd.DataFrame(_run_many(panel, tasks, workers=workers, store=store))
+
+
+# -------------------------------------------------------------------------- #
+# Function to run a walk-forward optimization over rolling train/test windows
+# -------------------------------------------------------------------------- #
+def walk_forward(panel: MarketPanel, start_trading_date: datetime.date, combinations: list,
+                 train_days: int = 504, test_days: int = 126, metric: str = 'sharpe',
+                 workers: int = None, base: Parameters = None, store: ResultStore = None) -> pd.DataFrame:
+    # Every combination is back-tested on each train window, the best one on `metric`
+    # is then back-tested on the test window that follows
+    base = base if base is not None else Parameters()
+    dates = panel.dates
+    splits = []
+    first = panel.position(start_trading_date)
+    while first + train_days + test_days <= len(dates):
+        splits.append((dates[first], dates[first + train_days - 1],
+                       dates[first + train_days], dates[first + train_days + test_days - 1]))
+        first += test_days
+    train_tasks = [(combination, train_start, train_end, base)
+                   for train_start, train_end, _, _ in splits for combination in combinations]
+    train_rows = _run_many(panel, train_tasks, workers=workers, store=store)
+    best = []
+    for i in range(len(splits)):
+        train = pd.DataFrame(train_rows[i * len(combinations):(i + 1) * len(combinations)])
+        best.append(train[metric].astype(float).fillna(float('-inf')).idxmax())
+    test_tasks = [(combinations[j], test_start, test_end, base)
+                  for j, (_, _, test_start, test_end) in zip(best, splits)]
+    test_rows = _run_many(panel, test_tasks, workers=workers, store=store)
+    report = []
+    for i, (train_start, train_end, test_start, test_end) in enumerate(splits):
+        j = best[i]
+        report.append({'train_start': train_start, 'train_end': train_end,
+                       'test_start': test_start, 'test_end': test_end,
+                       **combinations[j],
+                       'train_' + metric: train_rows[i * len(combinations) + j][metric],
+                       **{'test_' + kpi: test_rows[i][kpi] for kpi in KPI_COLUMNS}})
+    return pd.DataFrame(report)
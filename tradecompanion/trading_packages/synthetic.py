@@ -0,0 +1,51 @@
+# -------------------------------------------------------------------------- #
+# Synthetic OHCL data generators (no network)
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import datetime
+import zlib
+import numpy as np
+import pandas as pd
+from . import equities_universe as eu
+from . import market_data as md
+
+SYNTHETIC_START = datetime.date(2010, 1, 4)
+
+
+# -------------------------------------------------------------------------- #
+# Function to generate the daily bars of one ticker, always the same for a given ticker
+# -------------------------------------------------------------------------- #
+def synthetic_ohcl(tick: str, n_days: int = 1500, start_date: datetime.date = SYNTHETIC_START,
+                   freq: str = 'B') -> pd.DataFrame:
+    # n_days is the number of bars, freq='5min' gives intraday bars
+    rng = np.random.default_rng(zlib.crc32(tick.encode()))
+    index = pd.date_range(start_date, periods=n_days, freq=freq, name='Date')
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, n_days)))
+    open_price = close * (1 + rng.normal(0, 0.005, n_days))
+    high = np.maximum(open_price, close) * (1 + rng.uniform(0, 0.02, n_days))
+    low = np.minimum(open_price, close) * (1 - rng.uniform(0, 0.02, n_days))
+    # Occasional volume spikes so that the breakout signal fires now and then
+    volume = rng.lognormal(13, 0.3, n_days) * np.where(rng.random(n_days) < 0.03, 3, 1)
+    return pd.DataFrame({'Open': open_price, 'High': high, 'Low': low, 'Close': close,
+                         'Adj Close': close, 'Volume': volume.round()}, index=index)
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: data provider serving synthetic bars
+# -------------------------------------------------------------------------- #
+class SyntheticSource(md.DataSource):
+    def __init__(self, n_days: int = 1500):
+        self.n_days = n_days
+
+    def fetch(self, tick: str, start_date: datetime.date,
+              end_date: datetime.date = None, r: str = '1d') -> pd.DataFrame:
+        return md.date_slice(synthetic_ohcl(tick, self.n_days), start_date, end_date)
+
+
+# -------------------------------------------------------------------------- #
+# Function to load a synthetic universe of n_tickers stocks over n_days
+# -------------------------------------------------------------------------- #
+def synthetic_universe(n_tickers: int, n_days: int = 1500, precompute: bool = True) -> dict:
+    tickers = ['T{:04d}'.format(i) for i in range(n_tickers)]
+    return eu.load_universe(tickers, None, None, workers=1, source=SyntheticSource(n_days),
+                            precompute=precompute)
@@ -0,0 +1,133 @@
+# -------------------------------------------------------------------------- #
+# Universe Management module
+# -------------------------------------------------------------------------- #
+# Import Modules & Packages
+import datetime
+import hashlib
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+from typing import Callable
+import numpy as np
+import pandas as pd
+from .panel import MarketPanel
+
+
+# -------------------------------------------------------------------------- #
+# Function to get the first and last dates with data of every ticker of a panel
+# -------------------------------------------------------------------------- #
+def availability(panel: MarketPanel) -> pd.DataFrame:
+    has_bar = ~np.isnan(panel.close)
+    any_bar = has_bar.any(axis=0)
+    first = np.where(any_bar, has_bar.argmax(axis=0), -1)
+    last = np.where(any_bar, len(panel.dates) - 1 - has_bar[::-1].argmax(axis=0), -1)
+    return pd.DataFrame({'first_date': [panel.dates[i] if i >= 0 else None for i in first],
+                         'last_date': [panel.dates[i] if i >= 0 else None for i in last],
+                         'nb_of_bars': has_bar.sum(axis=0)}, index=pd.Index(panel.tickers, name='ticker'))
+
+
+# -------------------------------------------------------------------------- #
+# Class definition: SQLite store of the versioned universe lists and of the ticker metadata
+# -------------------------------------------------------------------------- #
+class UniverseStore(object):
+    def __init__(self, path, empty_checks: int = 3):
+        self.path = Path(path)
+        self.empty_checks = empty_checks  # Days a ticker is found without data before it is invalid
+        self.lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock, closing(sqlite3.connect(str(self.path))) as db, db:
+            db.execute('CREATE TABLE IF NOT EXISTS versions (version INTEGER PRIMARY KEY AUTOINCREMENT, '
+                       'source TEXT, digest TEXT, created TEXT)')
+            db.execute('CREATE TABLE IF NOT EXISTS members (version INTEGER, ticker TEXT, '
+                       'PRIMARY KEY (version, ticker))')
+            # A ticker is 'valid' once data was loaded for it, 'empty' when none was returned, and
+            # 'invalid' once none was returned on empty_checks different days
+            db.execute('CREATE TABLE IF NOT EXISTS tickers (ticker TEXT PRIMARY KEY, status TEXT, reason TEXT, '
+                       'first_date TEXT, last_date TEXT, checked TEXT, empty_checks INTEGER DEFAULT 0)')
+            if 'empty_checks' not in [column[1] for column in db.execute('PRAGMA table_info(tickers)')]:
+                db.execute('ALTER TABLE tickers ADD COLUMN empty_checks INTEGER DEFAULT 0')
+
+    def execute(self, query: str, values: tuple = ()) -> list:
+        with self.lock, closing(sqlite3.connect(str(self.path))) as db, db:
+            return db.execute(query, values).fetchall()
+
+    # -------------------------------------------------------------------------- #
+    # Versioned universe lists
+    # -------------------------------------------------------------------------- #
+    def save_list(self, tickers: list, source: str) -> int:
+        # A new version is only made when the list changed, returns the version of the list
+        tickers = sorted(set(tickers))
+        digest = hashlib.blake2b('\n'.join(tickers).encode(), digest_size=16).hexdigest()
+        latest = self.execute('SELECT version, digest FROM versions ORDER BY version DESC LIMIT 1')
+        if latest and latest[0][1] == digest:
+            return latest[0][0]
+        with self.lock, closing(sqlite3.connect(str(self.path))) as db, db:
+            version = db.execute('INSERT INTO versions (source, digest, created) VALUES (?, ?, ?)',
+                                 (source, digest, datetime.datetime.now().isoformat())).lastrowid
+            db.executemany('INSERT INTO members VALUES (?, ?)', [(version, tick) for tick in tickers])
+        return version
+
+    def refresh(self, scrape: Callable, source: str = 'wealthsimple') -> int:
+        # e.g. refresh(equities_universe.get_tick_wealth_simple), the scraped list is kept as a version
+        return self.save_list(scrape(), source)
+
+    def versions(self) -> pd.DataFrame:
+        rows = self.execute('SELECT v.version, v.source, v.created, COUNT(m.ticker) FROM versions v '
+                            'LEFT JOIN members m ON m.version = v.version GROUP BY v.version ORDER BY v.version')
+        return pd.DataFrame(rows, columns=['version', 'source', 'created', 'nb_of_tickers']).set_index('version')
+
+    def members(self, version: int = None) -> list:
+        # Tickers of a version of the universe, the latest one by default. None when there is no version.
+        if version is None:
+            latest = self.execute('SELECT MAX(version) FROM versions')
+            version = latest[0][0]
+            if version is None:
+                return None
+        return [tick for tick, in self.execute('SELECT ticker FROM members WHERE version = ? ORDER BY ticker',
+                                               (version,))]
+
+    # -------------------------------------------------------------------------- #
+    # Ticker validation and data availability
+    # -------------------------------------------------------------------------- #
+    def record_panel(self, panel: MarketPanel, requested: list, checked: datetime.datetime = None):
+        # Tickers of `requested` without any bar in the panel are marked invalid once this happened on
+        # empty_checks different days (yfinance also returns no bars when a download fails), and are
+        # left out by eligible() from then on. The others get their data availability range. The
+        # tickers of panel.failed are not checked: a download error says nothing about the ticker.
+        available = availability(panel)
+        checked = checked or datetime.datetime.now()
+        previous = {tick: (count, last) for tick, count, last in
+                    self.execute('SELECT ticker, empty_checks, checked FROM tickers')}
+        rows = []
+        for tick in requested:
+            if tick in panel.failed:
+                continue
+            if tick in available.index and available.at[tick, 'nb_of_bars'] > 0:
+                rows.append((tick, 'valid', None, str(available.at[tick, 'first_date']),
+                             str(available.at[tick, 'last_date']), checked.isoformat(), 0))
+                continue
+            count, last = previous.get(tick, (0, None))
+            count = count or 0
+            if last is None or datetime.datetime.fromisoformat(last).date() != checked.date():
+                count += 1
+            status = 'invalid' if count >= self.empty_checks else 'empty'
+            rows.append((tick, status, 'no data', None, None, checked.isoformat(), count))
+        with self.lock, closing(sqlite3.connect(str(self.path))) as db, db:
+            db.executemany('INSERT OR REPLACE INTO tickers VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def metadata(self) -> pd.DataFrame:
+        rows = self.execute('SELECT ticker, status, reason, first_date, last_date, checked, empty_checks '
+                            'FROM tickers')
+        return pd.DataFrame(rows, columns=['ticker', 'status', 'reason', 'first_date', 'last_date',
+                                           'checked', 'empty_checks']).set_index('ticker')
+
+    def eligible(self, tickers: list) -> list:
+        # Tickers not known to be invalid, the ones never checked included, in the order given
+        invalid = {tick for tick, in self.execute("SELECT ticker FROM tickers WHERE status = 'invalid'")}
+        return [tick for tick in tickers if tick not in invalid]
+
+    def revalidate(self, tickers: list):
+        # Forgets the status of tickers, so that they are loaded and checked again
+        with self.lock, closing(sqlite3.connect(str(self.path))) as db, db:
+            db.executemany('DELETE FROM tickers WHERE ticker = ?', [(tick,) for tick in tickers])